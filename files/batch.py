@@ -0,0 +1,126 @@
+"""
+Batch Alignment.
+
+This module allows the user to align many short pairs with
+one NumPy fill along a batch axis instead of one fill per pair.
+
+Functions
+---------
+alignBatch(nws: list[NW], size: int = BATCH) -> list[RESULT]:
+    Return statistics, alignment and annotation of every pair.
+"""
+
+from matrix import Matrix
+from nw import NW, Affine
+from cache import RESULT
+
+BATCH: int = 256  # pairs filled together
+PADDING: int = 2  # largest padded area of a chunk per area of its pairs
+
+def _check(nws: list[NW]) -> None:
+    """Raise ValueError unless every pair can share one batched fill."""
+    first: NW = nws[0]
+    for nw in nws:
+        if (
+            type(nw) is not type(first)
+            or nw.submatrix is not first.submatrix
+            or nw.gap != first.gap
+            or nw.extend != first.extend
+        ):
+            raise ValueError(
+                '"nws" must share class, submatrix, gap and extend'
+            )
+        if nw.space != "full" or nw.band:
+            raise ValueError('"nws" must use full space and no band')
+
+def _chunks(nws: list[NW], pending: list[int], size: int) -> list[list[int]]:
+    """
+    Return pending pairs in chunks of similar lengths, at most size each.
+
+    Pairs are sorted by length, and a chunk is closed once padding
+    every pair to its longest seq1 and seq2 would cover more than
+    PADDING times the matrix of its smallest pair, so one long pair
+    does not make the short pairs around it as slow as itself.
+    """
+    chunks: list[list[int]] = list()
+    chunk: list[int] = list()
+    rows: int = 0
+    cols: int = 0
+    smallest: int = 0
+    for k in sorted(
+        pending,
+        key=lambda k: (nws[k].seq1.getLength(), nws[k].seq2.getLength()),
+    ):
+        nrows: int = nws[k].seq1.getLength() + 1
+        ncols: int = nws[k].seq2.getLength() + 1
+        padded: int = max(rows, nrows) * max(cols, ncols)
+        area: int = min(smallest, nrows * ncols) if chunk else nrows * ncols
+        if chunk and (len(chunk) == size or padded > PADDING * area):
+            chunks.append(chunk)
+            chunk = list()
+            rows = cols = 0
+            area = nrows * ncols
+        chunk.append(k)
+        rows = max(rows, nrows)
+        cols = max(cols, ncols)
+        smallest = area
+    if chunk:
+        chunks.append(chunk)
+    return chunks
+
+def alignBatch(nws: list[NW], size: int = BATCH) -> list[RESULT]:
+    """
+    Return statistics, alignment and annotation of every pair.
+
+    The result for each instance is the one its report() gives. Pairs
+    found in an instance's cache are not aligned again; the rest are
+    filled by the batched NumPy kernels in chunks of at most size pairs
+    of similar lengths (see _chunks), and each traceback is then walked
+    on its own. A cutoff does not stop batched fills early; pairs below
+    it are rejected once scored.
+    """
+    import engine
+
+    if not nws:
+        return list()
+    _check(nws)
+    results: list[RESULT | None] = [None] * len(nws)
+    pending: list[int] = list()
+    for k, nw in enumerate(nws):
+        if nw.cache is not None:
+            results[k] = nw.cache.get(nw._cacheKey("alignment"))
+        if results[k] is None:
+            results[k] = nw._unreachable()
+        if results[k] is None:
+            pending.append(k)
+    first: NW = nws[0]
+    for chunk in _chunks(nws, pending, size):
+        encoded: list[tuple] = [nws[k]._encoded() for k in chunk]
+        codes1: list[bytes] = [codes[0] for codes in encoded]
+        codes2: list[bytes] = [codes[1] for codes in encoded]
+        with first._phase("fill"):
+            if isinstance(first, Affine):
+                scores, traces = engine.fillAffineBatch(
+                    codes1, codes2, first._table, first.gap, first.extend
+                )
+            else:
+                scores, traces = engine.fillLinearBatch(
+                    codes1, codes2, first._table, first.gap
+                )
+        for k, score, trace in zip(chunk, scores, traces):
+            nw: NW = nws[k]
+            traceback: Matrix = Matrix(trace.shape[0], trace.shape[1])
+            traceback.matrix = trace
+            nw._count(trace.shape[0], trace.shape[1], [traceback])
+            with nw._phase("traceback"):
+                if isinstance(nw, Affine):
+                    moves: bytes = nw._getTraceback(
+                        traceback, nw._traceStart(score)  # type: ignore
+                    )
+                else:
+                    moves = nw._getTraceback(traceback)  # type: ignore
+            with nw._phase("stats"):
+                results[k] = nw._screen(nw._collect(moves))
+            if nw.cache is not None:
+                nw.cache.put(nw._cacheKey("alignment"), results[k])
+    return results  # type: ignore
@@ -0,0 +1,188 @@
+"""
+Benchmark Needleman-Wunsch.
+
+This module allows the user to time Linear and Affine alignment
+on synthetic sequence pairs and compare results between runs.
+
+Usage:
+    benchmark.py [--sizes 100,200,400] [--identity 0.9]
+                 [--alphabet dna|protein] [--matrix path]
+                 [--engine python|numpy] [--space full|linear]
+                 [--repeat n] [--seed n] [--out results.json]
+
+Functions
+---------
+parseOptions(argv: list[str]) -> dict[str, str]:
+    Return optional "--name value" arguments.
+randomSequence(rng: random.Random, alphabet: str, length: int) -> str:
+    Return a uniformly random sequence.
+mutate(rng: random.Random, seq: str, alphabet: str, identity: float) -> str:
+    Return seq with substitutions and indels at rate 1 - identity.
+substitutionMatrix(alphabet: str) -> SUB_MATRIX:
+    Return a match/mismatch matrix over alphabet.
+measure(nw: Linear | Affine, mode: str) -> int:
+    Return peak traced memory of one run.
+runBenchmarks(options: dict[str, str]) -> list[dict[str, object]]:
+    Return one measurement per size, pair kind and scoring.
+"""
+
+import sys
+import json
+import time
+import random
+import tracemalloc
+from sequence import Sequence
+from file import MatrixFile
+from nw import Linear, Affine
+
+SUB_MATRIX = dict[tuple[str, str], int]
+ALPHABETS: dict[str, str] = {
+    "dna": "ACGT",
+    "protein": "ACDEFGHIKLMNPQRSTVWY",
+}
+OPTIONS: dict[str, str] = {
+    "sizes": "100,200,400",
+    "identity": "0.9",
+    "alphabet": "dna",
+    "matrix": "",
+    "engine": "python",
+    "space": "full",
+    "mode": "alignment",
+    "gap": "-2",
+    "extend": "-0.5",
+    "repeat": "3",
+    "seed": "1",
+    "out": "",
+}
+
+def parseOptions(argv: list[str]) -> dict[str, str]:
+    """Return optional "--name value" arguments."""
+    options: dict[str, str] = dict(OPTIONS)
+    for idx in range(0, len(argv), 2):
+        name: str = argv[idx].removeprefix("--")
+        if name not in OPTIONS or idx + 1 >= len(argv):
+            raise ValueError(f"invalid option: {argv[idx]}")
+        options[name] = argv[idx + 1]
+    return options
+
+def randomSequence(rng: random.Random, alphabet: str, length: int) -> str:
+    """Return a uniformly random sequence."""
+    return "".join(rng.choices(alphabet, k=length))
+
+def mutate(
+    rng: random.Random, seq: str, alphabet: str, identity: float
+) -> str:
+    """
+    Return seq with substitutions and indels at rate 1 - identity.
+
+    Half of the mutations are substitutions, a quarter deletions and a
+    quarter single-residue insertions.
+    """
+    rate: float = 1 - identity
+    out: list[str] = list()
+    for base in seq:
+        roll: float = rng.random()
+        if roll >= rate:
+            out.append(base)
+        elif roll < rate / 2:
+            out.append(rng.choice(alphabet))
+        elif roll < 3 * rate / 4:
+            continue
+        else:
+            out.append(base)
+            out.append(rng.choice(alphabet))
+    return "".join(out) or alphabet[0]
+
+def substitutionMatrix(alphabet: str) -> SUB_MATRIX:
+    """Return a match/mismatch matrix over alphabet."""
+    match: int = 2 if len(alphabet) <= 4 else 5
+    return {
+        (a, b): match if a == b else -1 for a in alphabet for b in alphabet
+    }
+
+def measure(nw: Linear | Affine, mode: str) -> int:
+    """Return peak traced memory of one run."""
+    tracemalloc.start()
+    nw.report(mode)
+    peak: int = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+def runBenchmarks(options: dict[str, str]) -> list[dict[str, object]]:
+    """
+    Return one measurement per size, pair kind and scoring.
+
+    "random" pairs are unrelated sequences and "mutated" pairs are a
+    sequence and a copy mutated down to the requested identity. Each
+    case is run repeat times and the fastest time is kept; peak memory
+    is traced on a separate run, since tracing slows the alignment. The
+    traced run goes first and doubles as a warm-up, and the numpy
+    engine is imported up front, so no timed run pays for imports.
+    """
+    rng: random.Random = random.Random(int(options["seed"]))
+    alphabet: str = ALPHABETS[options["alphabet"]]
+    if options["matrix"]:
+        submatrix: SUB_MATRIX = MatrixFile(options["matrix"]).generate()
+        alphabet = "".join(sorted({key[0] for key in submatrix}))
+    else:
+        submatrix = substitutionMatrix(alphabet)
+    identity: float = float(options["identity"])
+    if options["engine"] == "numpy":
+        import engine
+    results: list[dict[str, object]] = list()
+    for size in (int(size) for size in options["sizes"].split(",")):
+        seq: str = randomSequence(rng, alphabet, size)
+        pairs: dict[str, tuple[str, str]] = {
+            "random": (seq, randomSequence(rng, alphabet, size)),
+            "mutated": (seq, mutate(rng, seq, alphabet, identity)),
+        }
+        for kind, (seq1, seq2) in pairs.items():
+            for scoring in (Linear, Affine):
+                nw: Linear | Affine = scoring(
+                    Sequence(seq1),
+                    Sequence(seq2),
+                    submatrix,
+                    float(options["gap"]),
+                )
+                nw.extend = float(options["extend"])
+                nw.engine = options["engine"]
+                nw.space = options["space"]
+                peak: int = measure(nw, options["mode"])
+                best: float = min(
+                    _time(nw, options["mode"])
+                    for _ in range(int(options["repeat"]))
+                )
+                cells: int = len(seq1) * len(seq2)
+                results.append(
+                    {
+                        "scoring": scoring.__name__,
+                        "pair": kind,
+                        "size": size,
+                        "lengths": [len(seq1), len(seq2)],
+                        "cells": cells,
+                        "seconds": best,
+                        "cells_per_second": cells / best if best else 0.0,
+                        "peak_bytes": peak,
+                    }
+                )
+    return results
+
+def _time(nw: Linear | Affine, mode: str) -> float:
+    """Return wall time of one untraced run."""
+    start: float = time.perf_counter()
+    nw.report(mode)
+    return time.perf_counter() - start
+
+if __name__ == "__main__":
+    options: dict[str, str] = parseOptions(sys.argv[1:])
+    report: dict[str, object] = {
+        "options": options,
+        "python": sys.version.split()[0],
+        "results": runBenchmarks(options),
+    }
+    text: str = json.dumps(report, indent=2)
+    if options["out"]:
+        with open(options["out"], "w") as file:
+            file.write(text + "\n")
+    else:
+        print(text)
@@ -0,0 +1,183 @@
+"""
+Cache Class.
+
+This module allows the user to store Needleman-Wunsch results
+on disk, keyed by the content of the alignment problem, and
+reuse them across runs.
+
+Classes
+-------
+Cache
+"""
+
+import os
+import json
+import hashlib
+from collections import OrderedDict
+
+SUB_MATRIX = dict[tuple[str, str], int]
+RESULT = tuple[list[float], tuple[str, str], str]
+LIMIT: int = 256 << 20  # bytes kept on disk before eviction
+MEMO: int = 256  # results kept in memory for the current run
+SCAN: int = 16  # directory scans per limit's worth of bytes written
+
+class Cache:
+    """A class to represent a content-addressed store of alignment results."""
+
+    def __init__(self, path: str | None = None, limit: int = LIMIT) -> None:
+        """Construct all attributes for Cache."""
+        self.path = path
+        self.limit = limit
+        self._memo: OrderedDict[str, RESULT] = OrderedDict()
+        self._digests: dict[int, tuple[SUB_MATRIX, str]] = dict()
+        # key -> bytes on disk, least recently used first
+        self._index: OrderedDict[str, int] = OrderedDict()
+        self._size: int = 0
+        self._written: int = 0  # bytes put since the last scan
+        if path is not None:
+            os.makedirs(path, exist_ok=True)
+            self._scan()
+
+    @property
+    def path(self) -> str | None:
+        """Directory of cached results (None keeps them in memory only)."""
+        return self._path
+
+    @path.setter
+    def path(self, path: str | None) -> None:
+        if path is None or isinstance(path, str):
+            self._path = path
+        else:
+            raise ValueError('"path" must be a str or None')
+
+    @property
+    def limit(self) -> int:
+        """Bytes of results kept on disk."""
+        return self._limit
+
+    @limit.setter
+    def limit(self, limit: int) -> None:
+        if isinstance(limit, int) and limit >= 0:
+            self._limit = limit
+        else:
+            raise ValueError('"limit" must be a non-negative int')
+
+    def _scan(self) -> None:
+        """
+        Index the results on disk, oldest access first, and evict.
+
+        Workers sharing the directory only see each other's results
+        here, so the index is rebuilt from scratch rather than updated.
+        """
+        entries: list[tuple[float, str, int]] = list()
+        for entry in os.scandir(self.path):
+            if entry.name.endswith(".json"):
+                try:
+                    stat: os.stat_result = entry.stat()
+                except FileNotFoundError:  # evicted by another process
+                    continue
+                entries.append((stat.st_mtime, entry.name[:-5], stat.st_size))
+        self._index = OrderedDict()
+        self._size = 0
+        self._written = 0
+        for _, key, size in sorted(entries):
+            self._index[key] = size
+            self._size += size
+        self._evict()
+
+    def _file(self, key: str) -> str:
+        """Return path of the result stored under key."""
+        return os.path.join(self.path, key + ".json")  # type: ignore
+
+    def _digest(self, submatrix: SUB_MATRIX) -> str:
+        """Return hash of submatrix contents, computed once per dict."""
+        known: tuple[SUB_MATRIX, str] | None = self._digests.get(id(submatrix))
+        if known is None or known[0] is not submatrix:
+            text: str = repr(sorted(submatrix.items()))
+            known = submatrix, hashlib.sha256(text.encode()).hexdigest()
+            self._digests[id(submatrix)] = known
+        return known[1]
+
+    def key(
+        self,
+        kind: str,
+        seq1: str,
+        seq2: str,
+        submatrix: SUB_MATRIX,
+        gap: float,
+        extend: float,
+        mode: str,
+    ) -> str:
+        """Return hash identifying one alignment problem and its output."""
+        digest = hashlib.sha256()
+        for part in (kind, mode, repr(gap), repr(extend)):
+            digest.update(part.encode() + b"\0")
+        digest.update(self._digest(submatrix).encode() + b"\0")
+        digest.update(seq1.encode() + b"\0")
+        digest.update(seq2.encode())
+        return digest.hexdigest()
+
+    def get(self, key: str) -> RESULT | None:
+        """Return result stored under key, or None."""
+        if key in self._memo:
+            self._memo.move_to_end(key)
+            return self._memo[key]
+        if key not in self._index:
+            return None
+        try:
+            with open(self._file(key), "r") as file:
+                data: dict = json.load(file)
+            os.utime(self._file(key))
+        except (OSError, ValueError):  # evicted by another process
+            self._size -= self._index.pop(key)
+            return None
+        self._index.move_to_end(key)
+        result: RESULT = (
+            data["stats"],
+            (data["alignment"][0], data["alignment"][1]),
+            data["annotation"],
+        )
+        self._remember(key, result)
+        return result
+
+    def put(self, key: str, result: RESULT) -> None:
+        """
+        Store result under key, evicting least recently used results.
+
+        The directory is scanned again before evicting, and once this
+        process has written limit / SCAN bytes since the last scan, so
+        results written by other workers count towards the limit too.
+        """
+        self._remember(key, result)
+        if self.path is None:
+            return
+        stats, alignment, annotation = result
+        text: str = json.dumps(
+            {"stats": stats, "alignment": alignment, "annotation": annotation}
+        )
+        temp: str = f"{self._file(key)}.{os.getpid()}.tmp"
+        with open(temp, "w") as file:
+            file.write(text)
+        os.replace(temp, self._file(key))
+        self._size += len(text) - self._index.pop(key, 0)
+        self._index[key] = len(text)
+        self._written += len(text)
+        if self._size > self.limit or self._written * SCAN >= self.limit:
+            self._scan()
+
+    def _remember(self, key: str, result: RESULT) -> None:
+        """Keep result in memory for repeats within this run."""
+        self._memo[key] = result
+        self._memo.move_to_end(key)
+        while len(self._memo) > MEMO:
+            self._memo.popitem(last=False)
+
+    def _evict(self) -> None:
+        """Remove least recently used results until under the limit."""
+        while self._size > self.limit and self._index:
+            key, size = self._index.popitem(last=False)
+            self._size -= size
+            try:
+                os.remove(self._file(key))
+            except FileNotFoundError:
+                pass
@@ -0,0 +1,137 @@
+"""
+Checkpoint Class.
+
+This module allows the user to save the frontier of a
+Needleman-Wunsch matrix fill to disk and resume the fill
+from it after an interruption.
+
+Classes
+-------
+Checkpoint
+"""
+
+import os
+import json
+import time
+
+INTERVAL: float = 300.0  # seconds between saves
+FRONTIER = list[list[float]]
+
+class Checkpoint:
+    """A class to represent the saved progress of one matrix fill."""
+
+    def __init__(
+        self, path: str, key: str, interval: float = INTERVAL
+    ) -> None:
+        """Construct all attributes for Checkpoint."""
+        self.path = path
+        self.key = key
+        self.interval = interval
+        self._rows: int = 0  # traceback rows already in the trace file
+        self._saved: float = time.monotonic()
+        os.makedirs(path, exist_ok=True)
+
+    @property
+    def path(self) -> str:
+        """Directory of checkpoint files."""
+        return self._path
+
+    @path.setter
+    def path(self, path: str) -> None:
+        if isinstance(path, str):
+            self._path = path
+        else:
+            raise ValueError('"path" must be a str')
+
+    @property
+    def key(self) -> str:
+        """Hash identifying the fill, used to name its files."""
+        return self._key
+
+    @key.setter
+    def key(self, key: str) -> None:
+        if isinstance(key, str) and key:
+            self._key = key
+        else:
+            raise ValueError('"key" must be a non-empty str')
+
+    @property
+    def interval(self) -> float:
+        """Seconds between saves."""
+        return self._interval
+
+    @interval.setter
+    def interval(self, interval: float) -> None:
+        if isinstance(interval, (int, float)) and interval >= 0:
+            self._interval = float(interval)
+        else:
+            raise ValueError('"interval" must be a non-negative number')
+
+    def _file(self, suffix: str) -> str:
+        """Return path of the checkpoint file with suffix."""
+        return os.path.join(self.path, f"{self.key}.{suffix}")
+
+    def due(self) -> bool:
+        """Return True once interval seconds passed since the last save."""
+        return time.monotonic() - self._saved >= self.interval
+
+    def save(
+        self, row: int, frontier: FRONTIER, trace: list[bytearray]
+    ) -> None:
+        """
+        Save score rows of row and traceback rows 0..row.
+
+        Traceback rows are appended to the trace file, so each save
+        writes only the rows filled since the last one. The state file
+        naming the last complete row is replaced atomically after the
+        trace file is synced, so an interrupted save leaves the previous
+        checkpoint intact.
+        """
+        mode: str = "r+b" if self._rows else "wb"
+        with open(self._file("trace"), mode) as file:
+            file.seek(self._rows * len(trace[0]))  # drop a torn append
+            for line in trace[self._rows : row + 1]:
+                file.write(line)
+            file.truncate()
+            file.flush()
+            os.fsync(file.fileno())
+        state: dict[str, object] = {
+            "row": row,
+            "width": len(trace[0]),
+            "frontier": frontier,
+        }
+        temp: str = self._file(f"{os.getpid()}.tmp")
+        with open(temp, "w") as file:
+            json.dump(state, file)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp, self._file("state"))
+        self._rows = row + 1
+        self._saved = time.monotonic()
+
+    def load(self) -> tuple[int, FRONTIER, list[bytes]] | None:
+        """Return saved row, its score rows and traceback rows, or None."""
+        try:
+            with open(self._file("state"), "r") as file:
+                state: dict = json.load(file)
+            with open(self._file("trace"), "rb") as file:
+                width: int = state["width"]
+                data: bytes = file.read((state["row"] + 1) * width)
+        except (OSError, ValueError):
+            return None
+        row: int = state["row"]
+        if len(data) != (row + 1) * width:  # trace file cut short
+            return None
+        trace: list[bytes] = [
+            data[k * width : (k + 1) * width] for k in range(row + 1)
+        ]
+        self._rows = row + 1
+        return row, state["frontier"], trace
+
+    def remove(self) -> None:
+        """Delete the checkpoint files."""
+        for suffix in ("state", "trace"):
+            try:
+                os.remove(self._file(suffix))
+            except FileNotFoundError:
+                pass
@@ -0,0 +1,169 @@
+"""
+Needleman-Wunsch Client.
+
+This module allows the user to run alignments on a running
+server.py instead of starting the algorithm in a new process.
+It takes the arguments of main.py and writes the same output.
+
+Usage:
+    client.py <infile1> <infile2> <matrixfile> <outfile> <gap> <score> <extend>
+              [main.py options] [--socket path] [--host h] [--port n]
+
+Options that name server files or shape the whole run ("cache",
+"scratch", "checkpoint", "workers", "metrics", ...) are set when
+server.py starts and are rejected here.
+
+Functions
+---------
+parseOptions(argv: list[str]) -> tuple[dict[str, str], dict[str, str]]:
+    Return connection options and alignment options.
+run(argv: list[str]) -> None:
+    Send every pair to the server and write the replies in order.
+"""
+
+import os
+import sys
+import json
+import socket
+from typing import Iterator
+from sequence import Sequence
+from file import FastaFile
+from writer import Writer
+from process import OPTIONS
+from server import RESERVED, OPTIONS as SERVER_OPTIONS
+
+REQUEST = dict[str, object]
+CONNECTION: dict[str, str] = {
+    "socket": "",
+    "host": "127.0.0.1",
+    "port": "8765",
+}
+LOCAL: tuple[str, ...] = ("pairs", "format")  # used by the client itself
+WINDOW: int = 256  # pairs sent ahead of the next one to write
+
+def parseOptions(argv: list[str]) -> tuple[dict[str, str], dict[str, str]]:
+    """
+    Return connection options and alignment options.
+
+    Raises ValueError for an option the server does not take from a
+    request.
+    """
+    connection: dict[str, str] = dict(CONNECTION)
+    options: dict[str, str] = {"pairs": "index", "format": "text"}
+    extra: list[str] = argv[8:]
+    for idx in range(0, len(extra), 2):
+        name: str = extra[idx].removeprefix("--")
+        if idx + 1 >= len(extra):
+            raise ValueError(f"invalid option: {extra[idx]}")
+        if name in CONNECTION:
+            connection[name] = extra[idx + 1]
+        elif name in LOCAL or (name in OPTIONS and name not in RESERVED):
+            options[name] = extra[idx + 1]
+        elif name in RESERVED:
+            message: str = f"--{name} is not supported by client.py"
+            if name in SERVER_OPTIONS:
+                message += "; set it when starting server.py"
+            raise ValueError(message)
+        else:
+            raise ValueError(f"invalid option: {extra[idx]}")
+    return connection, options
+
+def _connect(connection: dict[str, str]) -> socket.socket:
+    """Return socket connected to the server."""
+    if connection["socket"]:
+        sock: socket.socket = socket.socket(socket.AF_UNIX)
+        sock.connect(connection["socket"])
+        return sock
+    return socket.create_connection(
+        (connection["host"], int(connection["port"]))
+    )
+
+def _requests(
+    argv: list[str], options: dict[str, str]
+) -> Iterator[tuple[REQUEST, tuple[str, str]]]:
+    """Yield one request per pair, numbered from 1, with its headers."""
+    fasta1: FastaFile = FastaFile(argv[1])
+    fasta2: FastaFile = FastaFile(argv[2])
+    fields: REQUEST = {
+        name: value for name, value in options.items() if name not in LOCAL
+    }
+    fields.update(
+        matrix=os.path.abspath(argv[3]),
+        gap=argv[5],
+        score=argv[6],
+        extend=argv[7],
+    )
+    pairs: Iterator[tuple[Sequence, Sequence]]
+    if options["pairs"] == "query":
+        query: Sequence = next(fasta1.stream())
+        pairs = ((query, seq2) for seq2 in fasta2.stream())
+    elif options["pairs"] == "index":
+        pairs = zip(fasta1.stream(), fasta2.stream())
+    else:
+        raise ValueError('"pairs" must be "index" or "query"')
+    for num, (seq1, seq2) in enumerate(pairs, 1):
+        request: REQUEST = dict(
+            fields, id=num, seq1=seq1.seqStr, seq2=seq2.seqStr
+        )
+        yield request, (seq1.header, seq2.header)
+
+def run(argv: list[str]) -> None:
+    """
+    Send every pair to the server and write the replies in order.
+
+    Up to WINDOW pairs are in flight past the next one to write.
+    Replies may arrive in any order and are held until every earlier
+    pair has been written, so the output matches main.py.
+    """
+    connection, options = parseOptions(argv)
+    outfile: str = argv[4]
+    if os.path.isfile(outfile):
+        os.remove(outfile)
+    requests: Iterator[tuple[REQUEST, tuple[str, str]]] = _requests(
+        argv, options
+    )
+    headers: dict[int, tuple[str, str]] = dict()  # of pairs in flight
+    held: dict[int, REQUEST] = dict()
+    sent: int = 0
+    written: int = 0
+    done: bool = False
+    with (
+        _connect(connection) as sock,
+        sock.makefile("rb") as replies,
+        Writer(outfile, options["format"]) as writer,
+    ):
+        while not (done and written == sent):
+            while not done and sent - written < WINDOW:
+                pair: tuple | None = next(requests, None)
+                if pair is None:
+                    done = True
+                    sock.shutdown(socket.SHUT_WR)
+                    break
+                request, headers[sent + 1] = pair
+                sock.sendall(json.dumps(request).encode() + b"\n")
+                sent += 1
+            if done and written == sent:
+                break
+            line: bytes = replies.readline()
+            if not line:
+                raise ConnectionError("server closed the connection")
+            reply: REQUEST = json.loads(line)
+            if "error" in reply:
+                raise ValueError(f"pair {reply['id']}: {reply['error']}")
+            held[reply["id"]] = reply  # type: ignore
+            while written + 1 in held:
+                written += 1
+                reply = held.pop(written)
+                writer.write(
+                    written,
+                    reply["stats"],  # type: ignore
+                    tuple(reply["alignment"]),  # type: ignore
+                    reply["annotation"],  # type: ignore
+                    headers.pop(written),
+                )
+
+if __name__ == "__main__":
+    if len(sys.argv) < 8 or len(sys.argv) % 2 != 0:
+        print(__doc__)
+        sys.exit("Please enter the correct input.")
+    run(sys.argv)
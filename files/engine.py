@@ -0,0 +1,813 @@
+"""
+Vectorized Engines.
+
+This module allows the user to fill Needleman-Wunsch matrices
+with NumPy arrays instead of nested Python loops.
+
+Functions
+---------
+encode(codes1: bytes, codes2: bytes, profile: TABLE) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    Return index arrays for both sequences and the seq1 profile array.
+fillLinear(codes1: bytes, codes2: bytes, profile: TABLE, gap: float, bounds: BOUNDS, scratch: str | None, limit: LIMIT | None) -> tuple[float, np.ndarray]:
+    Fill linear scoring matrices one anti-diagonal at a time.
+fillAffine(codes1: bytes, codes2: bytes, profile: TABLE, gap: float, extend: float, origin: int, bounds: BOUNDS, scratch: str | None, limit: LIMIT | None) -> tuple[list[float], np.ndarray]:
+    Fill affine scoring (Gotoh) matrices one anti-diagonal at a time.
+scoreLinear(codes1: bytes, codes2: bytes, profile: TABLE, gap: float, limit: LIMIT | None) -> tuple[int, int, int, float]:
+    Return statistics of the optimal linear path without a traceback.
+scoreAffine(codes1: bytes, codes2: bytes, profile: TABLE, gap: float, extend: float, limit: LIMIT | None) -> tuple[int, int, int, float]:
+    Return statistics of the optimal affine path without a traceback.
+crossLinear(codes1: bytes, codes2: bytes, profile: TABLE, gap: float, mid: int) -> int:
+    Return column where the optimal linear path enters row mid.
+crossAffine(codes1: bytes, codes2: bytes, profile: TABLE, gap: float, extend: float, origin: int, mid: int) -> tuple[list[float], list[int]]:
+    Return final scores and mid-row crossings of the affine states.
+fillLinearBatch(codes1: list[bytes], codes2: list[bytes], table: TABLE, gap: float) -> tuple[list[float], list[np.ndarray]]:
+    Fill linear scoring matrices of many pairs at once.
+fillAffineBatch(codes1: list[bytes], codes2: list[bytes], table: TABLE, gap: float, extend: float) -> tuple[list[list[float]], list[np.ndarray]]:
+    Fill affine scoring (Gotoh) matrices of many pairs at once.
+"""
+
+import tempfile
+import numpy as np
+from nw import DIAGONAL, LEFT, UP, M_STATE, I_STATE, D_STATE
+from nw import I_EXTEND, D_EXTEND, CHECK, LIMIT, Rejected
+
+TABLE = list[list[int]]
+BOUNDS = tuple[int, int] | None
+
+# Rows of the path statistics carried by score-only kernels.
+SCORE: int = 0
+MATCHES: int = 1
+DIAGONALS: int = 2
+INDELS: int = 3
+TOTAL: int = 4
+IN_GAP: int = 5
+
+
+def encode(
+    codes1: bytes, codes2: bytes, profile: TABLE | np.ndarray
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Return index arrays for both sequences and the seq1 profile array.
+
+    profile[i] holds the scores of residue i of seq1 against the
+    alphabet, so the substitution scores of a whole anti-diagonal are
+    one gather, profile[i - 1, codes2[j - 1]]. An array built once by
+    QueryProfile is used as it is.
+    """
+    scores: np.ndarray = np.asarray(profile, dtype=np.float64)
+    if scores.ndim < 2:  # empty seq1
+        scores = scores.reshape(0, 0)
+    return (
+        np.frombuffer(codes1, dtype=np.uint8).astype(np.intp),
+        np.frombuffer(codes2, dtype=np.uint8).astype(np.intp),
+        scores,
+    )
+
+
+def _traceArray(nrows: int, ncols: int, scratch: str | None) -> np.ndarray:
+    """
+    Return zeroed uint8 traceback array, memory-mapped under scratch if set.
+
+    The backing file is unlinked as soon as it is created, so it is
+    removed once the array is released.
+    """
+    if scratch is None:
+        return np.zeros((nrows, ncols), dtype=np.uint8)
+    with tempfile.TemporaryFile(dir=scratch) as file:
+        return np.memmap(file, np.uint8, "w+", shape=(nrows, ncols))
+
+
+def _traceShape(n: int, m: int, bounds: BOUNDS) -> tuple[int, int]:
+    """Return shape of the traceback array, one row of the band per row."""
+    if bounds is None:
+        return n + 1, m + 1
+    lo, hi = bounds
+    return n + 1, hi - lo + 1
+
+
+def _traceColumns(i: np.ndarray, j: np.ndarray, bounds: BOUNDS) -> np.ndarray:
+    """Return traceback array columns of cells i,j, j - i - lo in a band."""
+    if bounds is None:
+        return j
+    return j - i - bounds[0]
+
+
+def _traceEdges(
+    trace: np.ndarray,
+    n: int,
+    m: int,
+    bounds: BOUNDS,
+    top: tuple[int, int],
+    left: tuple[int, int],
+) -> None:
+    """
+    Set codes of the first row and column of trace.
+
+    top is (first column, code) of row 0 and left is (first row, code)
+    of column 0; cells off the band are skipped.
+    """
+    if bounds is None:
+        trace[0, top[0] :] = top[1]
+        trace[left[0] :, 0] = left[1]
+        return
+    lo, hi = bounds
+    trace[0, max(top[0], lo) - lo : min(m, hi) - lo + 1] = top[1]
+    i: np.ndarray = np.arange(max(left[0], -hi), min(n, -lo) + 1)
+    trace[i, -i - lo] = left[1]
+
+
+def _diagonalRange(d: int, n: int, m: int, bounds: BOUNDS) -> tuple[int, int]:
+    """Return first and last row of anti-diagonal d inside the band."""
+    first: int = max(0, d - m)
+    last: int = min(n, d)
+    if bounds is not None:
+        lo, hi = bounds
+        first = max(first, -((hi - d) // 2))
+        last = min(last, (d - lo) // 2)
+    return first, last
+
+
+def _abandon(
+    d: int, n: int, m: int, scores: list[np.ndarray], limit: LIMIT
+) -> None:
+    """
+    Raise Rejected if no path through diagonal d - 1 or d beats the cutoff.
+
+    A move advances i + j by one or two, so every path touches one of
+    two neighbouring anti-diagonals; scores holds their best scores by
+    row. The bound added to each cell is the one of NW._abandon.
+    """
+    cutoff, best, step = limit
+    bound: float = -np.inf
+    for k, values in zip((d - 1, d), scores):
+        i: np.ndarray = np.arange(max(0, k - m), min(n, k) + 1)
+        rows: np.ndarray = n - i
+        cols: np.ndarray = m - k + i
+        rest: np.ndarray = np.maximum(
+            np.minimum(rows, cols) * best + np.abs(rows - cols) * step,
+            (rows + cols) * step,
+        )
+        bound = max(bound, float(np.max(values[i] + rest)))
+    if round(bound, 1) < cutoff:
+        raise Rejected(bound)
+
+
+def fillLinear(
+    codes1: bytes,
+    codes2: bytes,
+    profile: TABLE,
+    gap: float,
+    bounds: BOUNDS = None,
+    scratch: str | None = None,
+    limit: LIMIT | None = None,
+) -> tuple[float, np.ndarray]:
+    """
+    Fill linear scoring matrices one anti-diagonal at a time.
+
+    Every cell on anti-diagonal d = i + j depends only on diagonals
+    d - 1 and d - 2, so a whole diagonal is computed with a handful
+    of array operations. Scores are kept for the last three diagonals
+    only, indexed by row. Ties are broken DIAGONAL > LEFT > UP, as in
+    Linear._traceValue. With bounds (lo, hi) only cells with
+    lo <= j - i <= hi are filled and the rest score -inf. With scratch
+    the traceback is a memory-mapped file in that directory. With limit
+    the fill raises Rejected once no path can reach the cutoff, tested
+    every CHECK diagonals.
+
+    Returns the optimal score and the (n+1)x(m+1) traceback codes, or
+    with bounds the (n+1)x(hi-lo+1) codes of the band, cell i,j at
+    column j - i - lo as in BandMatrix.
+    """
+    n: int = len(codes1)
+    m: int = len(codes2)
+    codes1, codes2, profile = encode(codes1, codes2, profile)
+    trace: np.ndarray = _traceArray(*_traceShape(n, m, bounds), scratch)
+    _traceEdges(trace, n, m, bounds, (1, UP), (1, LEFT))
+
+    rows: np.ndarray = np.arange(n + 1)
+    prev2: np.ndarray = np.full(n + 1, -np.inf)
+    prev1: np.ndarray = np.full(n + 1, -np.inf)
+    current: np.ndarray = np.full(n + 1, -np.inf)
+    spans: list[tuple[int, int]] = [(0, -1), (0, -1), (0, 0)]
+    prev1[0] = 0.0
+    for d in range(1, n + m + 1):
+        stale: tuple[int, int] = spans.pop(0)
+        current[stale[0] : stale[1] + 1] = -np.inf
+        first, last = _diagonalRange(d, n, m, bounds)
+        spans.append((first, last))
+        if d <= m and first == 0:
+            current[0] = d * gap
+        if d <= n and last == d:
+            current[d] = d * gap
+        lo: int = max(1, first)
+        hi: int = min(last, d - 1)
+        if lo <= hi:
+            i: np.ndarray = rows[lo : hi + 1]
+            j: np.ndarray = d - i
+            sub: np.ndarray = profile[i - 1, codes2[j - 1]]
+            diag: np.ndarray = prev2[i - 1] + sub
+            left: np.ndarray = prev1[i - 1] + gap
+            up: np.ndarray = prev1[i] + gap
+            best: np.ndarray = np.maximum(np.maximum(diag, left), up)
+            trace[i, _traceColumns(i, j, bounds)] = np.where(
+                best == diag, DIAGONAL, np.where(best == left, LEFT, UP)
+            )
+            current[lo : hi + 1] = best
+        if limit is not None and d % CHECK == 0:
+            _abandon(d, n, m, [prev1, current], limit)
+        prev2, prev1, current = prev1, current, prev2
+    return float(prev1[n]), trace
+
+
+def _firstGap(origin: int, state: int, gap: float, extend: float) -> float:
+    """Return score of the first leading gap column in state I or D."""
+    if origin == state:
+        return extend
+    if origin == M_STATE:
+        return gap
+    return -np.inf
+
+
+def fillAffine(
+    codes1: bytes,
+    codes2: bytes,
+    profile: TABLE,
+    gap: float,
+    extend: float,
+    origin: int = M_STATE,
+    bounds: BOUNDS = None,
+    scratch: str | None = None,
+    limit: LIMIT | None = None,
+) -> tuple[list[float], np.ndarray]:
+    """
+    Fill affine scoring (Gotoh) matrices one anti-diagonal at a time.
+
+    M depends on diagonal d - 2, while I (gap in seq1, same row) and
+    D (gap in seq2, same column) depend on diagonal d - 1. Working on
+    whole anti-diagonals therefore needs no scan along a row, and each
+    cell is computed with the same additions, in the same order, as
+    Affine._fillMatrices. Ties are broken M > I > D. The alignment
+    starts in state origin, which the linear-space mode uses to carry
+    an open gap into a block. bounds (a diagonal band), scratch and
+    limit work as in fillLinear.
+
+    Returns the final M, I and D scores and the packed traceback bytes
+    described in nw, shaped as in fillLinear.
+    """
+    n: int = len(codes1)
+    m: int = len(codes2)
+    codes1, codes2, profile = encode(codes1, codes2, profile)
+    trace: np.ndarray = _traceArray(*_traceShape(n, m, bounds), scratch)
+    top: tuple[int, int] = (1 if origin == I_STATE else 2), I_EXTEND
+    left: tuple[int, int] = (1 if origin == D_STATE else 2), D_EXTEND
+    _traceEdges(trace, n, m, bounds, top, left)
+    firstI: float = _firstGap(origin, I_STATE, gap, extend)
+    firstD: float = _firstGap(origin, D_STATE, gap, extend)
+
+    rows: np.ndarray = np.arange(n + 1)
+    buffers: list[list[np.ndarray]] = [
+        [np.full(n + 1, -np.inf) for _ in range(3)] for _ in range(3)
+    ]
+    spans: list[tuple[int, int]] = [(0, -1), (0, -1), (0, 0)]
+    prev2, prev1, current = buffers
+    for state in range(3):
+        prev1[state][0] = 0.0 if state == origin else -np.inf
+    for d in range(1, n + m + 1):
+        stale: tuple[int, int] = spans.pop(0)
+        for state in range(3):
+            current[state][stale[0] : stale[1] + 1] = -np.inf
+        first, last = _diagonalRange(d, n, m, bounds)
+        spans.append((first, last))
+        if d <= m and first == 0:
+            current[I_STATE][0] = firstI + ((d - 1) * extend)
+        if d <= n and last == d:
+            current[D_STATE][d] = firstD + ((d - 1) * extend)
+        lo: int = max(1, first)
+        hi: int = min(last, d - 1)
+        if lo <= hi:
+            i: np.ndarray = rows[lo : hi + 1]
+            j: np.ndarray = d - i
+            sub: np.ndarray = profile[i - 1, codes2[j - 1]]
+            fromM: np.ndarray = prev2[M_STATE][i - 1] + sub
+            fromI: np.ndarray = prev2[I_STATE][i - 1] + sub
+            fromD: np.ndarray = prev2[D_STATE][i - 1] + sub
+            best: np.ndarray = np.maximum(np.maximum(fromM, fromI), fromD)
+            code: np.ndarray = np.where(
+                best == fromM,
+                M_STATE,
+                np.where(best == fromI, I_STATE, D_STATE),
+            ).astype(np.uint8)
+            current[M_STATE][lo : hi + 1] = best
+
+            openI: np.ndarray = prev1[M_STATE][i] + gap
+            extendI: np.ndarray = prev1[I_STATE][i] + extend
+            best = np.maximum(openI, extendI)
+            code[best != openI] |= I_EXTEND
+            current[I_STATE][lo : hi + 1] = best
+
+            openD: np.ndarray = prev1[M_STATE][i - 1] + gap
+            extendD: np.ndarray = prev1[D_STATE][i - 1] + extend
+            best = np.maximum(openD, extendD)
+            code[best != openD] |= D_EXTEND
+            current[D_STATE][lo : hi + 1] = best
+            trace[i, _traceColumns(i, j, bounds)] = code
+        if limit is not None and d % CHECK == 0:
+            frontier: list[np.ndarray] = [
+                np.max(diagonal, axis=0) for diagonal in (prev1, current)
+            ]
+            _abandon(d, n, m, frontier, limit)
+        prev2, prev1, current = prev1, current, prev2
+    scores: list[float] = [float(prev1[state][n]) for state in range(3)]
+    return scores, trace
+
+
+def scoreLinear(
+    codes1: bytes,
+    codes2: bytes,
+    profile: TABLE,
+    gap: float,
+    limit: LIMIT | None = None,
+) -> tuple[int, int, int, float]:
+    """
+    Return statistics of the optimal linear path without a traceback.
+
+    Runs the fillLinear recurrence, but instead of traceback codes each
+    cell carries the matches, diagonal moves, indels, path score and
+    trailing-gap flag of the path its pointer leads to. limit works as
+    in fillLinear.
+
+    Returns matches, diagonals, indels and the path score.
+    """
+    n: int = len(codes1)
+    m: int = len(codes2)
+    codes1, codes2, profile = encode(codes1, codes2, profile)
+    edges: list[float] = [0]
+    for _ in range(max(n, m)):
+        edges.append(edges[-1] + gap)
+
+    rows: np.ndarray = np.arange(n + 1)
+    prev2: np.ndarray = np.empty((6, n + 1), dtype=np.float64)
+    prev1: np.ndarray = np.empty((6, n + 1), dtype=np.float64)
+    current: np.ndarray = np.empty((6, n + 1), dtype=np.float64)
+    prev1[:, 0] = 0.0
+    for d in range(1, n + m + 1):
+        if d <= m:
+            current[:, 0] = (d * gap, 0, 0, 1, edges[d], 1)
+        if d <= n:
+            current[:, d] = (d * gap, 0, 0, 1, edges[d], 1)
+        lo: int = max(1, d - m)
+        hi: int = min(n, d - 1)
+        if lo <= hi:
+            i: np.ndarray = rows[lo : hi + 1]
+            j: np.ndarray = d - i
+            sub: np.ndarray = profile[i - 1, codes2[j - 1]]
+            diag: np.ndarray = prev2[:, i - 1]
+            diag[SCORE] += sub
+            diag[MATCHES] += codes1[i - 1] == codes2[j - 1]
+            diag[DIAGONALS] += 1
+            diag[TOTAL] += sub
+            diag[IN_GAP] = 0
+            left: np.ndarray = prev1[:, i - 1]
+            up: np.ndarray = prev1[:, i]
+            for move in (left, up):
+                move[SCORE] += gap
+                move[INDELS] += 1 - move[IN_GAP]
+                move[TOTAL] += gap
+                move[IN_GAP] = 1
+            best: np.ndarray = np.maximum(
+                np.maximum(diag[SCORE], left[SCORE]), up[SCORE]
+            )
+            current[:, lo : hi + 1] = np.where(
+                best == diag[SCORE],
+                diag,
+                np.where(best == left[SCORE], left, up),
+            )
+        if limit is not None and d % CHECK == 0:
+            _abandon(d, n, m, [prev1[SCORE], current[SCORE]], limit)
+        prev2, prev1, current = prev1, current, prev2
+    last: np.ndarray = prev1[:, n]
+    total: float = float(last[TOTAL])
+    if not last[INDELS]:  # a gapless path keeps an int total, as in Linear
+        total = int(total)
+    return (
+        int(last[MATCHES]),
+        int(last[DIAGONALS]),
+        int(last[INDELS]),
+        total,
+    )
+
+
+def scoreAffine(
+    codes1: bytes,
+    codes2: bytes,
+    profile: TABLE,
+    gap: float,
+    extend: float,
+    limit: LIMIT | None = None,
+) -> tuple[int, int, int, float]:
+    """
+    Return statistics of the optimal affine path without a traceback.
+
+    Runs the fillAffine recurrence while each state of each cell carries
+    the matches, diagonal moves, indels and substitution total of the
+    path its pointer leads to. limit works as in fillLinear.
+
+    Returns matches, diagonals, indels and the substitution total.
+    """
+    n: int = len(codes1)
+    m: int = len(codes2)
+    codes1, codes2, profile = encode(codes1, codes2, profile)
+    rows: np.ndarray = np.arange(n + 1)
+    buffers: list[list[np.ndarray]] = [
+        [np.empty((5, n + 1), dtype=np.float64) for _ in range(3)]
+        for _ in range(3)
+    ]
+    prev2, prev1, current = buffers
+    for state in range(3):
+        prev1[state][:, 0] = 0.0
+        prev1[state][SCORE, 0] = 0.0 if state == M_STATE else -np.inf
+    for d in range(1, n + m + 1):
+        leading: tuple[float, ...] = (gap + ((d - 1) * extend), 0, 0, 1, 0)
+        if d <= m:
+            current[M_STATE][:, 0] = (-np.inf, 0, 0, 0, 0)
+            current[I_STATE][:, 0] = leading
+            current[D_STATE][:, 0] = (-np.inf, 0, 0, 0, 0)
+        if d <= n:
+            current[M_STATE][:, d] = (-np.inf, 0, 0, 0, 0)
+            current[I_STATE][:, d] = (-np.inf, 0, 0, 0, 0)
+            current[D_STATE][:, d] = leading
+        lo: int = max(1, d - m)
+        hi: int = min(n, d - 1)
+        if lo <= hi:
+            i: np.ndarray = rows[lo : hi + 1]
+            j: np.ndarray = d - i
+            sub: np.ndarray = profile[i - 1, codes2[j - 1]]
+            match: np.ndarray = codes1[i - 1] == codes2[j - 1]
+            fromM, fromI, fromD = [prev2[state][:, i - 1] for state in range(3)]
+            for move in (fromM, fromI, fromD):
+                move[SCORE] += sub
+                move[MATCHES] += match
+                move[DIAGONALS] += 1
+                move[TOTAL] += sub
+            best: np.ndarray = np.maximum(
+                np.maximum(fromM[SCORE], fromI[SCORE]), fromD[SCORE]
+            )
+            current[M_STATE][:, lo : hi + 1] = np.where(
+                best == fromM[SCORE],
+                fromM,
+                np.where(best == fromI[SCORE], fromI, fromD),
+            )
+
+            openI: np.ndarray = prev1[M_STATE][:, i]
+            openI[SCORE] += gap
+            openI[INDELS] += 1
+            extendI: np.ndarray = prev1[I_STATE][:, i]
+            extendI[SCORE] += extend
+            current[I_STATE][:, lo : hi + 1] = np.where(
+                openI[SCORE] >= extendI[SCORE], openI, extendI
+            )
+
+            openD: np.ndarray = prev1[M_STATE][:, i - 1]
+            openD[SCORE] += gap
+            openD[INDELS] += 1
+            extendD: np.ndarray = prev1[D_STATE][:, i - 1]
+            extendD[SCORE] += extend
+            current[D_STATE][:, lo : hi + 1] = np.where(
+                openD[SCORE] >= extendD[SCORE], openD, extendD
+            )
+        if limit is not None and d % CHECK == 0:
+            frontier: list[np.ndarray] = [
+                np.max([diagonal[state][SCORE] for state in range(3)], axis=0)
+                for diagonal in (prev1, current)
+            ]
+            _abandon(d, n, m, frontier, limit)
+        prev2, prev1, current = prev1, current, prev2
+    ends: list[np.ndarray] = [prev1[state][:, n] for state in range(3)]
+    scores: list[float] = [float(end[SCORE]) for end in ends]
+    last: np.ndarray = ends[scores.index(max(scores))]
+    return (
+        int(last[MATCHES]),
+        int(last[DIAGONALS]),
+        int(last[INDELS]),
+        float(last[TOTAL]),
+    )
+
+
+def crossLinear(
+    codes1: bytes, codes2: bytes, profile: TABLE, gap: float, mid: int
+) -> int:
+    """
+    Return column where the optimal linear path enters row mid.
+
+    Runs the fillLinear recurrence while each cell below row mid also
+    carries the column at which its traceback first reaches row mid,
+    with the ties and additions of Linear._crossColumn, so both return
+    the same column.
+    """
+    n: int = len(codes1)
+    m: int = len(codes2)
+    codes1, codes2, profile = encode(codes1, codes2, profile)
+    rows: np.ndarray = np.arange(n + 1)
+    prev2, prev1, current = [np.zeros(n + 1) for _ in range(3)]
+    cross2, cross1, crossing = [
+        np.zeros(n + 1, dtype=np.intp) for _ in range(3)
+    ]
+    for d in range(1, n + m + 1):
+        if d <= m:
+            current[0] = d * gap
+            crossing[0] = d
+        if d <= n:
+            current[d] = d * gap
+            crossing[d] = 0
+        lo: int = max(1, d - m)
+        hi: int = min(n, d - 1)
+        if lo <= hi:
+            i: np.ndarray = rows[lo : hi + 1]
+            j: np.ndarray = d - i
+            sub: np.ndarray = profile[i - 1, codes2[j - 1]]
+            diag: np.ndarray = prev2[i - 1] + sub
+            left: np.ndarray = prev1[i - 1] + gap
+            up: np.ndarray = prev1[i] + gap
+            best: np.ndarray = np.maximum(np.maximum(diag, left), up)
+            current[lo : hi + 1] = best
+            crossing[lo : hi + 1] = np.where(
+                i <= mid,
+                j,
+                np.where(
+                    best == diag,
+                    cross2[i - 1],
+                    np.where(best == left, cross1[i - 1], cross1[i]),
+                ),
+            )
+        prev2, prev1, current = prev1, current, prev2
+        cross2, cross1, crossing = cross1, crossing, cross2
+    return int(cross1[n])
+
+
+def crossAffine(
+    codes1: bytes,
+    codes2: bytes,
+    profile: TABLE,
+    gap: float,
+    extend: float,
+    origin: int,
+    mid: int,
+) -> tuple[list[float], list[int]]:
+    """
+    Return final scores and mid-row crossings of the affine states.
+
+    Runs the fillAffine recurrence from state origin while each state
+    of each cell below row mid also carries the point 4 * column + state
+    at which its traceback first reaches row mid, with the ties and
+    additions of Affine._crossPoint.
+
+    Returns the final M, I and D scores and their crossing points.
+    """
+    n: int = len(codes1)
+    m: int = len(codes2)
+    codes1, codes2, profile = encode(codes1, codes2, profile)
+    firstI: float = _firstGap(origin, I_STATE, gap, extend)
+    firstD: float = _firstGap(origin, D_STATE, gap, extend)
+    rows: np.ndarray = np.arange(n + 1)
+    buffers: list[list[np.ndarray]] = [
+        [np.full(n + 1, -np.inf) for _ in range(3)] for _ in range(3)
+    ]
+    crosses: list[list[np.ndarray]] = [
+        [np.zeros(n + 1, dtype=np.intp) for _ in range(3)] for _ in range(3)
+    ]
+    prev2, prev1, current = buffers
+    cross2, cross1, crossing = crosses
+    for state in range(3):
+        prev1[state][0] = 0.0 if state == origin else -np.inf
+        cross1[state][0] = state
+    for d in range(1, n + m + 1):
+        if d <= m:
+            for state in range(3):
+                current[state][0] = -np.inf
+                crossing[state][0] = 4 * d + state
+            current[I_STATE][0] = firstI + ((d - 1) * extend)
+        if d <= n:
+            for state in range(3):
+                current[state][d] = -np.inf
+                crossing[state][d] = state
+            current[D_STATE][d] = firstD + ((d - 1) * extend)
+        lo: int = max(1, d - m)
+        hi: int = min(n, d - 1)
+        if lo <= hi:
+            i: np.ndarray = rows[lo : hi + 1]
+            j: np.ndarray = d - i
+            above: np.ndarray = i <= mid
+            sub: np.ndarray = profile[i - 1, codes2[j - 1]]
+            fromM: np.ndarray = prev2[M_STATE][i - 1] + sub
+            fromI: np.ndarray = prev2[I_STATE][i - 1] + sub
+            fromD: np.ndarray = prev2[D_STATE][i - 1] + sub
+            best: np.ndarray = np.maximum(np.maximum(fromM, fromI), fromD)
+            current[M_STATE][lo : hi + 1] = best
+            crossing[M_STATE][lo : hi + 1] = np.where(
+                above,
+                4 * j + M_STATE,
+                np.where(
+                    best == fromM,
+                    cross2[M_STATE][i - 1],
+                    np.where(
+                        best == fromI,
+                        cross2[I_STATE][i - 1],
+                        cross2[D_STATE][i - 1],
+                    ),
+                ),
+            )
+
+            openI: np.ndarray = prev1[M_STATE][i] + gap
+            extendI: np.ndarray = prev1[I_STATE][i] + extend
+            best = np.maximum(openI, extendI)
+            current[I_STATE][lo : hi + 1] = best
+            crossing[I_STATE][lo : hi + 1] = np.where(
+                above,
+                4 * j + I_STATE,
+                np.where(
+                    best == openI, cross1[M_STATE][i], cross1[I_STATE][i]
+                ),
+            )
+
+            openD: np.ndarray = prev1[M_STATE][i - 1] + gap
+            extendD: np.ndarray = prev1[D_STATE][i - 1] + extend
+            best = np.maximum(openD, extendD)
+            current[D_STATE][lo : hi + 1] = best
+            crossing[D_STATE][lo : hi + 1] = np.where(
+                above,
+                4 * j + D_STATE,
+                np.where(
+                    best == openD,
+                    cross1[M_STATE][i - 1],
+                    cross1[D_STATE][i - 1],
+                ),
+            )
+        prev2, prev1, current = prev1, current, prev2
+        cross2, cross1, crossing = cross1, crossing, cross2
+    scores: list[float] = [float(prev1[state][n]) for state in range(3)]
+    points: list[int] = [int(cross1[state][n]) for state in range(3)]
+    return scores, points
+
+
+def _pad(codes: list[bytes]) -> tuple[np.ndarray, np.ndarray]:
+    """Return codes padded with 0 into one index array, and their lengths."""
+    lengths: np.ndarray = np.array([len(seq) for seq in codes], dtype=np.intp)
+    padded: np.ndarray = np.zeros(
+        (len(codes), int(lengths.max(initial=0))), dtype=np.intp
+    )
+    for k, seq in enumerate(codes):
+        padded[k, : len(seq)] = np.frombuffer(seq, dtype=np.uint8)
+    return padded, lengths
+
+
+def fillLinearBatch(
+    codes1: list[bytes], codes2: list[bytes], table: TABLE, gap: float
+) -> tuple[list[float], list[np.ndarray]]:
+    """
+    Fill linear scoring matrices of many pairs at once.
+
+    Pairs are padded to the longest seq1 and seq2 and stacked along a
+    leading batch axis, and the fillLinear recurrence runs on whole
+    anti-diagonals of every pair together. A cell inside a pair's own
+    (n+1)x(m+1) rectangle only depends on cells inside it, so padding
+    never reaches a real cell and each pair gets the scores and codes
+    fillLinear gives it. The lengths mask where each result is read:
+    the score at (n, m) once diagonal n + m is done, and the traceback
+    codes inside the rectangle.
+
+    Returns the optimal score and traceback codes of every pair.
+    """
+    seqs1, n = _pad(codes1)
+    seqs2, m = _pad(codes2)
+    scores: np.ndarray = np.asarray(table, dtype=np.float64)
+    pairs: int = len(codes1)
+    width: int = seqs1.shape[1]
+    height: int = seqs2.shape[1]
+    trace: np.ndarray = np.zeros((pairs, width + 1, height + 1), np.uint8)
+    trace[:, 0, 1:] = UP
+    trace[:, 1:, 0] = LEFT
+
+    rows: np.ndarray = np.arange(width + 1)
+    prev2: np.ndarray = np.full((pairs, width + 1), -np.inf)
+    prev1: np.ndarray = np.full((pairs, width + 1), -np.inf)
+    current: np.ndarray = np.full((pairs, width + 1), -np.inf)
+    spans: list[tuple[int, int]] = [(0, -1), (0, -1), (0, 0)]
+    prev1[:, 0] = 0.0
+    ends: np.ndarray = n + m
+    final: np.ndarray = np.zeros(pairs)  # two empty sequences score 0
+    for d in range(1, width + height + 1):
+        stale: tuple[int, int] = spans.pop(0)
+        current[:, stale[0] : stale[1] + 1] = -np.inf
+        first, last = _diagonalRange(d, width, height, None)
+        spans.append((first, last))
+        if d <= height:
+            current[:, 0] = d * gap
+        if d <= width:
+            current[:, d] = d * gap
+        lo: int = max(1, first)
+        hi: int = min(last, d - 1)
+        if lo <= hi:
+            i: np.ndarray = rows[lo : hi + 1]
+            j: np.ndarray = d - i
+            sub: np.ndarray = scores[seqs1[:, i - 1], seqs2[:, j - 1]]
+            diag: np.ndarray = prev2[:, i - 1] + sub
+            left: np.ndarray = prev1[:, i - 1] + gap
+            up: np.ndarray = prev1[:, i] + gap
+            best: np.ndarray = np.maximum(np.maximum(diag, left), up)
+            trace[:, i, j] = np.where(
+                best == diag, DIAGONAL, np.where(best == left, LEFT, UP)
+            )
+            current[:, lo : hi + 1] = best
+        done: np.ndarray = np.flatnonzero(ends == d)
+        final[done] = current[done, n[done]]
+        prev2, prev1, current = prev1, current, prev2
+    traces: list[np.ndarray] = [
+        trace[k, : n[k] + 1, : m[k] + 1] for k in range(pairs)
+    ]
+    return final.tolist(), traces
+
+
+def fillAffineBatch(
+    codes1: list[bytes],
+    codes2: list[bytes],
+    table: TABLE,
+    gap: float,
+    extend: float,
+) -> tuple[list[list[float]], list[np.ndarray]]:
+    """
+    Fill affine scoring (Gotoh) matrices of many pairs at once.
+
+    Runs the fillAffine recurrence, from state M, along a batch axis
+    as fillLinearBatch does.
+
+    Returns the final M, I and D scores and the packed traceback bytes
+    of every pair.
+    """
+    seqs1, n = _pad(codes1)
+    seqs2, m = _pad(codes2)
+    scores: np.ndarray = np.asarray(table, dtype=np.float64)
+    pairs: int = len(codes1)
+    width: int = seqs1.shape[1]
+    height: int = seqs2.shape[1]
+    trace: np.ndarray = np.zeros((pairs, width + 1, height + 1), np.uint8)
+    trace[:, 0, 2:] = I_EXTEND
+    trace[:, 2:, 0] = D_EXTEND
+
+    rows: np.ndarray = np.arange(width + 1)
+    buffers: list[list[np.ndarray]] = [
+        [np.full((pairs, width + 1), -np.inf) for _ in range(3)]
+        for _ in range(3)
+    ]
+    spans: list[tuple[int, int]] = [(0, -1), (0, -1), (0, 0)]
+    prev2, prev1, current = buffers
+    prev1[M_STATE][:, 0] = 0.0
+    ends: np.ndarray = n + m
+    final: np.ndarray = np.full((pairs, 3), -np.inf)
+    final[ends == 0, M_STATE] = 0.0
+    for d in range(1, width + height + 1):
+        stale: tuple[int, int] = spans.pop(0)
+        for state in range(3):
+            current[state][:, stale[0] : stale[1] + 1] = -np.inf
+        first, last = _diagonalRange(d, width, height, None)
+        spans.append((first, last))
+        if d <= height:
+            current[I_STATE][:, 0] = gap + ((d - 1) * extend)
+        if d <= width:
+            current[D_STATE][:, d] = gap + ((d - 1) * extend)
+        lo: int = max(1, first)
+        hi: int = min(last, d - 1)
+        if lo <= hi:
+            i: np.ndarray = rows[lo : hi + 1]
+            j: np.ndarray = d - i
+            sub: np.ndarray = scores[seqs1[:, i - 1], seqs2[:, j - 1]]
+            fromM: np.ndarray = prev2[M_STATE][:, i - 1] + sub
+            fromI: np.ndarray = prev2[I_STATE][:, i - 1] + sub
+            fromD: np.ndarray = prev2[D_STATE][:, i - 1] + sub
+            best: np.ndarray = np.maximum(np.maximum(fromM, fromI), fromD)
+            code: np.ndarray = np.where(
+                best == fromM,
+                M_STATE,
+                np.where(best == fromI, I_STATE, D_STATE),
+            ).astype(np.uint8)
+            current[M_STATE][:, lo : hi + 1] = best
+
+            openI: np.ndarray = prev1[M_STATE][:, i] + gap
+            extendI: np.ndarray = prev1[I_STATE][:, i] + extend
+            best = np.maximum(openI, extendI)
+            code[best != openI] |= I_EXTEND
+            current[I_STATE][:, lo : hi + 1] = best
+
+            openD: np.ndarray = prev1[M_STATE][:, i - 1] + gap
+            extendD: np.ndarray = prev1[D_STATE][:, i - 1] + extend
+            best = np.maximum(openD, extendD)
+            code[best != openD] |= D_EXTEND
+            current[D_STATE][:, lo : hi + 1] = best
+            trace[:, i, j] = code
+        done: np.ndarray = np.flatnonzero(ends == d)
+        for state in range(3):
+            final[done, state] = current[state][done, n[done]]
+        prev2, prev1, current = prev1, current, prev2
+    traces: list[np.ndarray] = [
+        trace[k, : n[k] + 1, : m[k] + 1] for k in range(pairs)
+    ]
+    return final.tolist(), traces
@@ -12,12 +12,14 @@ MatrixFile
 FastaFile
 """
 
+import os
+import marshal
+from typing import Iterator
+from sequence import Sequence, ALPHABET, TABLE, register
+
 SUB_MATRIX = dict[tuple[str, str], int]
 KEYS = list[tuple[str, str]]
-
-import regex
-from typing import TextIO
-from sequence import Sequence
+SIDECAR: str = ".nwc"  # suffix of the compiled matrix next to the text file
 
 class File:
     """A class to represent a file."""
@@ -65,10 +67,8 @@ class MatrixFile(File):
     def _processFile(self, lines: list[str]) -> list[str]:
         """Return processed lines of substitution matrix file."""
         lines = self.remove(lines, "\n")
-        lines = self.remove(lines, "\n")
         for i in range(len(lines)):
-            lines[i] = regex.sub(r'[\n]', '', lines[i]) # type: ignore
-            lines[i] = lines[i].split()
+            lines[i] = lines[i].split()  # type: ignore
         return lines
 
     def _createKeys(self, bases: list[str]) -> KEYS:
@@ -100,11 +100,80 @@ class MatrixFile(File):
         keys: KEYS = self._createKeys(lines[0])
         submatrix: SUB_MATRIX = self._fillSubMatrix(keys, lines)
         return submatrix
-    
+
+    def _compile(self, lines: list[str]) -> dict[str, object]:
+        """Return substitution matrix and dense table of processed lines."""
+        keys: KEYS = self._createKeys(lines[0])
+        return {
+            "submatrix": self._fillSubMatrix(keys, lines),
+            "bases": list(lines[0]),
+            "table": [[int(value) for value in row[1:]] for row in lines[1:]],
+        }
+
+    def _load(self) -> dict[str, object]:
+        """
+        Return the compiled matrix, from its sidecar file when valid.
+
+        The sidecar (path + SIDECAR) is trusted while the text file
+        keeps the size and mtime it records; after a touch or copy the
+        text is hashed and, if unchanged, the sidecar is re-stamped
+        instead of parsed again. A missing, stale or unreadable sidecar
+        is rebuilt, and a directory that cannot be written to only
+        costs the parse.
+        """
+        stat: os.stat_result = os.stat(self.path)
+        stamp: list[int] = [stat.st_mtime_ns, stat.st_size]
+        sidecar: str = self.path + SIDECAR
+        saved: dict | None = None
+        try:
+            with open(sidecar, "rb") as file:
+                saved = marshal.load(file)
+            if saved["stamp"] == stamp:  # type: ignore
+                return saved  # type: ignore
+        except (OSError, EOFError, ValueError, TypeError, KeyError):
+            saved = None
+        import hashlib
+
+        with open(self.path, "rb") as file:
+            text: bytes = file.read()
+        digest: str = hashlib.sha256(text).hexdigest()
+        if saved is None or saved.get("hash") != digest:
+            lines: list[str] = text.decode().splitlines(keepends=True)
+            saved = self._compile(self._processFile(lines))
+            saved["hash"] = digest
+        saved["stamp"] = stamp
+        temp: str = f"{sidecar}.{os.getpid()}.tmp"
+        try:
+            with open(temp, "wb") as file:
+                marshal.dump(saved, file)
+            os.replace(temp, sidecar)
+        except OSError:
+            pass
+        return saved
+
     def generate(self) -> SUB_MATRIX:
-        """Return substitution matrix."""
-        submatrix: SUB_MATRIX = self._createSubMatrix()
+        """
+        Return substitution matrix, compiled once per matrix file.
+
+        Its alphabet map and table come from the same compiled file and
+        are registered for sequence.tabulate, so aligners never build
+        them again.
+        """
+        compiled: dict[str, object] = self._load()
+        submatrix: SUB_MATRIX = compiled["submatrix"]  # type: ignore
+        register(submatrix, *self._table(compiled))
         return submatrix
+
+    def generateTable(self) -> tuple[ALPHABET, TABLE]:
+        """Return alphabet map and dense score table, indexed [row][col]."""
+        return self._table(self._load())
+
+    def _table(self, compiled: dict[str, object]) -> tuple[ALPHABET, TABLE]:
+        """Return alphabet map and table of a compiled matrix."""
+        bases: list[str] = compiled["bases"]  # type: ignore
+        alphabet: ALPHABET = {base: idx for idx, base in enumerate(bases)}
+        table: TABLE = compiled["table"]  # type: ignore
+        return alphabet, table
     
     def print(self) -> None:
         submatrix: SUB_MATRIX = self._createSubMatrix()
@@ -120,37 +189,33 @@ class FastaFile(File):
         """Construct all attributes for FastaFile."""
         super().__init__(path)
 
-    def _processFile(self, lines: list[str]) -> list[str]:
-        """Process fasta file."""
-        seqs: list[str] = list()
-        seq: str = ""
-        for line in lines:
-            if not line.startswith(">"):
-                line = regex.sub(r'[\n]', '', line)
-                seq = seq + line
-            else:
-                seqs.append(seq)
-                seq = ""
-        seqs.append(seq)
-        seqs = self.remove(seqs, "")
-        return seqs
-
-    def _fillSequences(self, lines: list[str]) -> list[str]:
-        """Fill Sequence dictionary."""
-        seqs: dict[int, Sequence] = dict()
-        for idx in range(len(lines)):
-            seqs[idx] = Sequence(lines[idx])
-        return seqs
+    def stream(self) -> Iterator[Sequence]:
+        """
+        Yield Sequences one record at a time.
+
+        Lines are collected in a list and joined once per record, so
+        only the current record is held in memory. Records without
+        residues are skipped.
+        """
+        header: str = ""
+        parts: list[str] = list()
+        with open(self.path, 'r') as file:
+            for line in file:
+                if line.startswith(">"):
+                    seq: str = "".join(parts)
+                    if seq:
+                        yield Sequence(seq, header)
+                    header = line[1:].rstrip("\n")
+                    parts = list()
+                else:
+                    parts.append(line.rstrip("\n"))
+        seq = "".join(parts)
+        if seq:
+            yield Sequence(seq, header)
 
     def _createSequences(self) -> dict[int, Sequence]:
         """Create dictionary of Sequences."""
-        path: str = self.path
-        file: TextIO = open(path, 'r')
-        lines: list[str] = file.readlines()
-        file.close()
-
-        lines = self._processFile(lines)
-        seqs: dict[int, Sequence] = self._fillSequences(lines)
+        seqs: dict[int, Sequence] = dict(enumerate(self.stream()))
         return seqs
     
     def generate(self) -> dict[int, Sequence]:
@@ -6,16 +6,27 @@ Needleman-Wunsch algorithm.
 """
 
 import sys
-import process
 
-argv: list[str] = sys.argv
-if (len(argv) != 8):
-    print(
-        """
-        Usage: 
-        main.py <infile1> <infile2> <matrixfile> <outfile> <gap> <score> <extend>
-        """
-        )
-    sys.exit("Please enter the correct input.")
+if __name__ == "__main__":
+    argv: list[str] = sys.argv
+    if (len(argv) < 8 or len(argv) % 2 != 0):
+        print(
+            """
+            Usage: 
+            main.py <infile1> <infile2> <matrixfile> <outfile> <gap> <score> <extend>
+                    [--engine python|numpy] [--space full|linear]
+                    [--mode alignment|score] [--band k] [--workers n]
+                    [--pairs index|query|all] [--format text|tsv|jsonl]
+                    [--cache dir] [--cache-size MiB] [--metrics file]
+                    [--scratch dir] [--checkpoint dir]
+                    [--checkpoint-every seconds] [--batch n]
+                    [--cutoff score] [--min-identity percent]
+                    [--prefilter identity] [--kmer k]
+                    [--prefilter-action skip|score]
+            """
+            )
+        sys.exit("Please enter the correct input.")
 
-process.writeAlignment(argv)
\ No newline at end of file
+    import process
+
+    process.writeAlignment(argv)
@@ -7,18 +7,29 @@ a matrix (score or traceback).
 Classes
 -------
 Matrix
+BandMatrix
+MappedMatrix
 """
 
-MATRIX = list[list[float | str]]
+import mmap
+from array import array
+from typing import Iterator
+
+MATRIX = list[list[float | str]] | list[bytearray]
+# Flat row-major cells: doubles, bytes, Python objects or a NumPy array.
+CELLS = array | bytearray | memoryview | list[float | str]
 
 class Matrix:
     """A class to represent a matrix."""
 
+    __slots__ = ("_nrows", "_ncols", "_width", "_cells")
+
     def __init__(self, nrows: int, ncols: int) -> None:
         """Construct all attributes for Matrix."""
         self.nrows = nrows
         self.ncols = ncols
-        self.matrix: MATRIX = [[0]]
+        self._width: int = ncols  # cells stored per row
+        self.cells: CELLS = list()
 
     @property
     def nrows(self) -> int:
@@ -44,47 +55,262 @@ class Matrix:
         else:
             raise ValueError('"ncols" must be an int')
 
+    @property
+    def cells(self) -> CELLS:
+        """Cells of Matrix in one row-major buffer."""
+        return self._cells
+
+    @cells.setter
+    def cells(self, cells: CELLS) -> None:
+        self._cells = cells
+
     @property
     def matrix(self) -> MATRIX:
-        """Number of rows of Matrix."""
-        return self._matrix
-    
+        """Rows of Matrix, as views of the cells; writes reach Matrix."""
+        return [self.row(i) for i in range(self.nrows)]  # type: ignore
+
     @matrix.setter
     def matrix(self, matrix: MATRIX) -> None:
-        self._matrix = matrix
+        if hasattr(matrix, "reshape"):  # NumPy array, kept without copying
+            self.cells = matrix.reshape(-1)  # type: ignore
+        elif matrix and isinstance(matrix[0], (bytes, bytearray)):
+            self.cells = bytearray().join(matrix)  # type: ignore
+        else:
+            self.cells = [value for row in matrix for value in row]
+
+    def row(self, row: int) -> CELLS:
+        """Return view of the stored cells of row; writes reach Matrix."""
+        start: int = row * self._width
+        if isinstance(self.cells, list):
+            return _ListRow(self.cells, start, self._width)  # type: ignore
+        return memoryview(self.cells)[start : start + self._width]
 
     def setValue(self, value: float | str, row: int, col: int) -> None:
         """Set value of row,col in Matrix."""
-        self.matrix[row][col] = value
+        self._check(row, col)
+        self.cells[row * self._width + col] = value
 
     def getValue(self, row: int, col: int) -> float | str:
         """Get value of row,col in Matrix."""
-        if (row > self.nrows or col > self.ncols):
+        self._check(row, col)
+        value: float | str = self.cells[row * self._width + col]
+        return value
+
+    def setCell(self, value: float | str, row: int, col: int) -> None:
+        """Set value of row,col without a range check, for kernels."""
+        self.cells[row * self._width + col] = value
+
+    def getCell(self, row: int, col: int) -> float | str:
+        """Get value of row,col without a range check, for kernels."""
+        return self.cells[row * self._width + col]
+
+    def _check(self, row: int, col: int) -> None:
+        """Raise ValueError if row,col is outside Matrix."""
+        if not (0 <= row < self.nrows and 0 <= col < self.ncols):
             raise ValueError(
                 f"{row} or {col} is out of range: nrows={self.nrows}, ncols={self.ncols}"
                 )
-        value: float | str = self.matrix[row][col]
-        return value
+
+    def _allocate(self, valueType: str, size: int) -> CELLS:
+        """Return size zero cells of valueType in one allocation."""
+        if (valueType == "byte"):  # compact traceback codes
+            return bytearray(size)
+        if (valueType == "string"):
+            return ["0"] * size
+        return array("d", [0.0]) * size
 
     def initialize(self, valueType: str) -> None:
         """Initialize zero Matrix."""
-        matrix: MATRIX = list()
-        for i in range(self.nrows):
-            matrix.append([])
-            for j in range(self.ncols):
-                if (valueType == "string"):
-                    matrix[i].append("0")
-                else:
-                    matrix[i].append(0)
-        self.matrix = matrix
+        self.cells = self._allocate(valueType, self.nrows * self._width)
+
+    def span(self, row: int) -> range:
+        """Return columns of row stored in Matrix."""
+        return range(self.ncols)
+
+    def nbytes(self) -> int:
+        """Return approximate bytes held by the cell storage."""
+        cells: CELLS = self.cells
+        if hasattr(cells, "nbytes"):  # NumPy array or memoryview
+            return cells.nbytes  # type: ignore
+        if isinstance(cells, array):
+            return len(cells) * cells.itemsize
+        if isinstance(cells, bytearray):
+            return len(cells)
+        return 8 * len(cells)  # one pointer per cell
 
     def print(self) -> None:
         """Print Matrix."""
         for i in range(self.nrows):
-            end: str = ", "
-            lastIndex: int = self.ncols - 1
-            for j in range(self.ncols):
-                if j == lastIndex:
-                    end = "\n"
-                print(self.matrix[i][j], sep = "\t", end = end)
-                
\ No newline at end of file
+            row: list[float | str] = [
+                self.getValue(i, j) for j in range(self.ncols)
+            ]
+            print(*row, sep=", ")
+
+
+class _ListRow:
+    """A class to represent a view of one row of list cells."""
+
+    __slots__ = ("_cells", "_start", "_width")
+
+    def __init__(self, cells: list, start: int, width: int) -> None:
+        """Construct all attributes for _ListRow."""
+        self._cells = cells
+        self._start = start
+        self._width = width
+
+    def _cols(self, col: slice) -> range:
+        """Return cell indices of the columns in col."""
+        return range(*col.indices(self._width))
+
+    def _index(self, col: int) -> int:
+        """Return cell index of column col, counted from the end if < 0."""
+        if col < 0:
+            col += self._width
+        if not 0 <= col < self._width:
+            raise IndexError("row index out of range")
+        return self._start + col
+
+    def __getitem__(self, col: int | slice) -> object:
+        if isinstance(col, slice):
+            return [self._cells[self._start + k] for k in self._cols(col)]
+        return self._cells[self._index(col)]
+
+    def __setitem__(self, col: int | slice, value: object) -> None:
+        if isinstance(col, slice):
+            cols: range = self._cols(col)
+            values: list = list(value)  # type: ignore
+            if len(values) != len(cols):
+                raise ValueError("row slice assignment must keep its length")
+            for k, item in zip(cols, values):
+                self._cells[self._start + k] = item
+        else:
+            self._cells[self._index(col)] = value
+
+    def __len__(self) -> int:
+        return self._width
+
+    def __iter__(self) -> Iterator:
+        return iter(self._cells[self._start : self._start + self._width])
+
+    def __repr__(self) -> str:
+        return repr(list(self))
+
+
+class BandMatrix(Matrix):
+    """A class to represent the diagonal band of a matrix."""
+
+    __slots__ = ("_lo", "_hi", "_fill")
+
+    def __init__(
+        self, nrows: int, ncols: int, lo: int, hi: int, fill: float
+    ) -> None:
+        """Construct all attributes for BandMatrix."""
+        super().__init__(nrows, ncols)
+        self.lo = lo
+        self.hi = hi
+        self.fill = fill
+        self._width = hi - lo + 1
+
+    @property
+    def lo(self) -> int:
+        """Lowest col - row stored in BandMatrix."""
+        return self._lo
+
+    @lo.setter
+    def lo(self, lo: int) -> None:
+        if isinstance(lo, int):
+            self._lo = lo
+        else:
+            raise ValueError('"lo" must be an int')
+
+    @property
+    def hi(self) -> int:
+        """Highest col - row stored in BandMatrix."""
+        return self._hi
+
+    @hi.setter
+    def hi(self, hi: int) -> None:
+        if isinstance(hi, int):
+            self._hi = hi
+        else:
+            raise ValueError('"hi" must be an int')
+
+    @property
+    def fill(self) -> float:
+        """Value of cells outside the band."""
+        return self._fill
+
+    @fill.setter
+    def fill(self, fill: float) -> None:
+        self._fill = fill
+
+    def setValue(self, value: float | str, row: int, col: int) -> None:
+        """Set value of row,col in BandMatrix, ignoring cells off the band."""
+        offset: int = col - row - self.lo
+        if 0 <= offset < self._width:
+            self.cells[row * self._width + offset] = value
+
+    def getValue(self, row: int, col: int) -> float | str:
+        """Get value of row,col in BandMatrix."""
+        offset: int = col - row - self.lo
+        if 0 <= offset < self._width:
+            return self.cells[row * self._width + offset]
+        return self.fill
+
+    setCell = setValue  # the band test is the only check BandMatrix makes
+    getCell = getValue
+
+    def span(self, row: int) -> range:
+        """Return columns of row stored in BandMatrix."""
+        return range(max(0, row + self.lo), min(self.ncols, row + self.hi + 1))
+
+
+class MappedMatrix(Matrix):
+    """A class to represent a matrix stored in a memory-mapped file."""
+
+    __slots__ = ("_scratch", "_map")
+
+    def __init__(self, nrows: int, ncols: int, scratch: str) -> None:
+        """Construct all attributes for MappedMatrix."""
+        super().__init__(nrows, ncols)
+        self.scratch = scratch
+        self._map: mmap.mmap | None = None
+
+    @property
+    def scratch(self) -> str:
+        """Directory holding the backing file."""
+        return self._scratch
+
+    @scratch.setter
+    def scratch(self, scratch: str) -> None:
+        if isinstance(scratch, str):
+            self._scratch = scratch
+        else:
+            raise ValueError('"scratch" must be a str')
+
+    def initialize(self, valueType: str) -> None:
+        """
+        Initialize zero MappedMatrix.
+
+        Cells live in an unlinked temporary file under scratch, one
+        double ("integer") or one byte ("byte") each, so the page cache
+        rather than swap holds whatever does not fit in memory. The file
+        is removed by the system once the matrix is released.
+        """
+        import tempfile
+
+        formats: dict[str, str] = {"integer": "d", "byte": "B"}
+        if valueType not in formats:
+            raise ValueError(f'"valueType" must be one of {tuple(formats)}')
+        size: int = self.nrows * self._width
+        size *= 8 if valueType == "integer" else 1
+        with tempfile.TemporaryFile(dir=self.scratch) as file:
+            file.truncate(size)  # sparse file, reads back as zeros
+            self._map = mmap.mmap(file.fileno(), size)
+        self.cells = memoryview(self._map).cast(formats[valueType])
+
+    def nbytes(self) -> int:
+        """Return bytes of the mapped file, or of cells assigned directly."""
+        if self._map is None:  # e.g. a NumPy memmap set through matrix
+            return super().nbytes()
+        return len(self._map)
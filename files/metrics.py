@@ -0,0 +1,109 @@
+"""
+Metrics Class.
+
+This module allows the user to record how long each phase of
+the Needleman-Wunsch algorithm takes, how many cells it fills
+and how much matrix memory it allocates.
+
+Classes
+-------
+Metrics
+"""
+
+import json
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterator
+
+RECORD = dict[str, object]
+PHASES: tuple[str, ...] = ("create", "fill", "traceback", "stats", "write")
+
+class Metrics:
+    """A class to represent per-phase measurements of alignments."""
+
+    def __init__(
+        self, callbacks: list[Callable[[RECORD], None]] | None = None
+    ) -> None:
+        """Construct all attributes for Metrics."""
+        self.callbacks = callbacks or list()
+        self.records: list[RECORD] = list()
+        self._current: RECORD = self._empty()
+        self._started: float = time.perf_counter()
+
+    @property
+    def callbacks(self) -> list[Callable[[RECORD], None]]:
+        """Functions called with the record of each finished alignment."""
+        return self._callbacks
+
+    @callbacks.setter
+    def callbacks(self, callbacks: list[Callable[[RECORD], None]]) -> None:
+        if all(callable(callback) for callback in callbacks):
+            self._callbacks = callbacks
+        else:
+            raise ValueError('"callbacks" must be callables')
+
+    def _empty(self) -> RECORD:
+        """Return record of an alignment with nothing measured yet."""
+        return {
+            "phases": {phase: 0.0 for phase in PHASES},
+            "cells": 0,
+            "bytes": 0,
+        }
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Add time spent inside the with block to phase name."""
+        start: float = time.perf_counter()
+        try:
+            yield
+        finally:
+            phases: dict[str, float] = self._current["phases"]  # type: ignore
+            phases[name] = phases.get(name, 0.0) + time.perf_counter() - start
+
+    def count(self, cells: int, nbytes: int = 0) -> None:
+        """Add filled cells and allocated matrix bytes."""
+        self._current["cells"] += cells  # type: ignore
+        self._current["bytes"] += nbytes  # type: ignore
+
+    def finish(self, num: int) -> RECORD:
+        """Return the record of alignment num and start a new one."""
+        record: RECORD = self._current
+        record["num"] = num
+        self._current = self._empty()
+        return record
+
+    def add(self, record: RECORD) -> None:
+        """Keep a finished record and pass it to the callbacks."""
+        self.records.append(record)
+        for callback in self.callbacks:
+            callback(record)
+
+    def summary(self) -> RECORD:
+        """Return run totals with cells/second of the fill phase."""
+        phases: dict[str, float] = {phase: 0.0 for phase in PHASES}
+        cells: int = 0
+        nbytes: int = 0
+        for record in self.records:
+            for name, seconds in record["phases"].items():  # type: ignore
+                phases[name] = phases.get(name, 0.0) + seconds
+            cells += record["cells"]  # type: ignore
+            nbytes = max(nbytes, record["bytes"])  # type: ignore
+        fill: float = phases["fill"]
+        return {
+            "alignments": len(self.records),
+            "wall_seconds": time.perf_counter() - self._started,
+            "phases": phases,
+            "cells": cells,
+            "peak_matrix_bytes": nbytes,
+            "cells_per_second": cells / fill if fill else 0.0,
+        }
+
+    def dump(self, path: str) -> None:
+        """Write summary and per-alignment records as JSON."""
+        with open(path, "w") as file:
+            json.dump(
+                {"summary": self.summary(), "alignments": self.records},
+                file,
+                indent=2,
+            )
+            file.write("\n")
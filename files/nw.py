@@ -6,30 +6,88 @@ algorithm with either Linear or Affine scoring.
 
 Classes
 -------
+Rejected
 NW
 Linear
 Affine
 """
 
-from typing import TextIO
-from matrix import Matrix
-from sequence import Sequence
+import hashlib
+from contextlib import nullcontext
+from typing import ContextManager, Iterable
+from matrix import Matrix, BandMatrix, MappedMatrix
+from sequence import Sequence, ALPHABET, TABLE, tabulate
+from query import QueryProfile
+from writer import Writer
+from cache import Cache, RESULT
+from metrics import Metrics
+from checkpoint import Checkpoint, INTERVAL
 
 SUB_MATRIX = dict[tuple[str, str], int]
+ENGINES: tuple[str, ...] = ("python", "numpy")
+SPACES: tuple[str, ...] = ("full", "linear")
+BLOCK: int = 1 << 14  # cells below which linear space solves a full matrix
+EPSILON: float = 1e-9  # margin for the banded optimality test
+IDLE = nullcontext()  # phase context used when metrics are disabled
+NEG_INF: float = float("-inf")
+# cutoff, best substitution score and highest score of one gap column
+LIMIT = tuple[float, float, float]
+REJECTED: list[None] = [None] * 6  # statistics of a pair below the cutoff
+CHECK: int = 8  # rows (or anti-diagonals) between cutoff tests
+
+# Linear traceback codes, one byte per cell.
+STOP: int = 0
+DIAGONAL: int = 1
+LEFT: int = 2
+UP: int = 3
+
+# Affine traceback byte: bits 0-1 hold the state M was reached from,
+# bit 2 is set when I extends I and bit 3 when D extends D.
+M_STATE: int = 0
+I_STATE: int = 1
+D_STATE: int = 2
+M_MASK: int = 3
+I_EXTEND: int = 4
+D_EXTEND: int = 8
+
+
+class Rejected(Exception):
+    """A class to represent a fill abandoned below the score cutoff."""
+
+    def __init__(self, bound: float) -> None:
+        """Construct all attributes for Rejected."""
+        super().__init__(f"score bound {bound} is below the cutoff")
+        self.bound = bound
 
 
 class NW:
     """A class to represent the Needleman-Wunch algorithm."""
 
     def __init__(
-        self, seq1: Sequence, seq2: Sequence, submatrix: SUB_MATRIX, gap: float
+        self,
+        seq1: Sequence,
+        seq2: Sequence,
+        submatrix: SUB_MATRIX,
+        gap: float,
+        profile: QueryProfile | None = None,
     ) -> None:
         """Construct all attributes for NW."""
         self.seq1 = seq1
         self.seq2 = seq2
+        self.profile = profile
         self.submatrix = submatrix
         self.gap = float(gap)
         self.extend = -0.1
+        self.engine = "python"
+        self.space = "full"
+        self.band = 0
+        self.scratch = None
+        self.cutoff = None
+        self.identity = None
+        self.cache = None
+        self.metrics = None
+        self._bounds: tuple[int, int] | None = None  # current band, if any
+        self._encoded()  # reject unknown residues before any work
 
     @property
     def seq1(self) -> Sequence:
@@ -57,6 +115,100 @@ class NW:
     @submatrix.setter
     def submatrix(self, submatrix: SUB_MATRIX) -> None:
         self._submatrix = submatrix
+        self._alphabet: ALPHABET
+        self._table: TABLE
+        if self._shared(submatrix):
+            self._alphabet = self.profile.alphabet  # type: ignore
+            self._table = self.profile.table  # type: ignore
+        else:
+            self._alphabet, self._table = tabulate(submatrix)
+
+    @property
+    def profile(self) -> QueryProfile | None:
+        """Precomputed query profile of seq1, reused across targets."""
+        return self._profile
+
+    @profile.setter
+    def profile(self, profile: QueryProfile | None) -> None:
+        if profile is None or isinstance(profile, QueryProfile):
+            self._profile = profile
+        else:
+            raise ValueError('"profile" must be a QueryProfile or None')
+
+    @property
+    def cache(self) -> Cache | None:
+        """Store of earlier results consulted before aligning."""
+        return self._cache
+
+    @cache.setter
+    def cache(self, cache: Cache | None) -> None:
+        if cache is None or isinstance(cache, Cache):
+            self._cache = cache
+        else:
+            raise ValueError('"cache" must be a Cache or None')
+
+    @property
+    def metrics(self) -> Metrics | None:
+        """Recorder of per-phase timings, cells and matrix bytes."""
+        return self._metrics
+
+    @metrics.setter
+    def metrics(self, metrics: Metrics | None) -> None:
+        if metrics is None or isinstance(metrics, Metrics):
+            self._metrics = metrics
+        else:
+            raise ValueError('"metrics" must be a Metrics or None')
+
+    def _phase(self, name: str) -> ContextManager[None]:
+        """Return context timing phase name, or a no-op when disabled."""
+        if self.metrics is None:
+            return IDLE
+        return self.metrics.phase(name)
+
+    def _count(self, nrows: int, ncols: int, matrices: list[Matrix]) -> None:
+        """Record cells filled and bytes held by matrices."""
+        if self.metrics is None:
+            return
+        cells: int = nrows * ncols
+        if self._bounds is not None:
+            lo, hi = self._bounds
+            cells = sum(
+                max(0, min(ncols, i + hi + 1) - max(0, i + lo))
+                for i in range(nrows)
+            )
+        nbytes: int = sum(matrix.nbytes() for matrix in matrices)
+        self.metrics.count(cells, nbytes)
+
+    def _finish(self, num: int) -> None:
+        """Close the metrics record of alignment num."""
+        if self.metrics is not None:
+            self.metrics.add(self.metrics.finish(num))
+
+    def _shared(self, submatrix: SUB_MATRIX) -> bool:
+        """Return True if the profile was built from submatrix."""
+        return self.profile is not None and self.profile.submatrix is submatrix
+
+    def _encoded(self, array: bool = False) -> tuple[bytes, bytes, TABLE]:
+        """
+        Return seq1 codes, seq2 codes and the scores of each seq1 residue.
+
+        The scores come from the query profile when it matches seq1, and
+        array selects its NumPy form for the vectorized engine.
+        """
+        profile: QueryProfile | None = self.profile
+        if (
+            profile is not None
+            and profile.query is self.seq1
+            and self._shared(self.submatrix)
+        ):
+            rows: TABLE = profile.rows
+            if array:
+                rows = profile.array()  # type: ignore
+            return profile.codes, self.seq2.encode(self._alphabet), rows
+        codes1: bytes = self.seq1.encode(self._alphabet)
+        codes2: bytes = self.seq2.encode(self._alphabet)
+        rows = [self._table[code] for code in codes1]
+        return codes1, codes2, rows
 
     @property
     def gap(self) -> float:
@@ -76,78 +228,302 @@ class NW:
     def extend(self, extend: float) -> None:
         self._extend = extend
 
+    @property
+    def engine(self) -> str:
+        """Engine used to fill matrices ("python" or "numpy")."""
+        return self._engine
+
+    @engine.setter
+    def engine(self, engine: str) -> None:
+        if engine in ENGINES:
+            self._engine = engine
+        else:
+            raise ValueError(f'"engine" must be one of {ENGINES}')
+
+    @property
+    def space(self) -> str:
+        """Memory mode of the algorithm ("full" or "linear")."""
+        return self._space
+
+    @space.setter
+    def space(self, space: str) -> None:
+        if space in SPACES:
+            self._space = space
+        else:
+            raise ValueError(f'"space" must be one of {SPACES}')
+
+    @property
+    def band(self) -> int:
+        """Initial band half-width for banded alignment (0 disables)."""
+        return self._band
+
+    @band.setter
+    def band(self, band: int) -> None:
+        if isinstance(band, int) and band >= 0:
+            self._band = band
+        else:
+            raise ValueError('"band" must be a non-negative int')
+
+    @property
+    def scratch(self) -> str | None:
+        """Directory for memory-mapped matrices (None keeps them in RAM)."""
+        return self._scratch
+
+    @scratch.setter
+    def scratch(self, scratch: str | None) -> None:
+        if scratch is None or isinstance(scratch, str):
+            self._scratch = scratch
+        else:
+            raise ValueError('"scratch" must be a str or None')
+
+    @property
+    def cutoff(self) -> float | None:
+        """Minimum score of a reported pair (None reports every pair)."""
+        return self._cutoff
+
+    @cutoff.setter
+    def cutoff(self, cutoff: float | None) -> None:
+        if cutoff is None or isinstance(cutoff, (int, float)):
+            self._cutoff = cutoff
+        else:
+            raise ValueError('"cutoff" must be a number or None')
+
+    @property
+    def identity(self) -> float | None:
+        """Minimum percent identity of a reported pair (None reports all)."""
+        return self._identity
+
+    @identity.setter
+    def identity(self, identity: float | None) -> None:
+        if identity is None or (
+            isinstance(identity, (int, float)) and 0 <= identity <= 100
+        ):
+            self._identity = identity
+        else:
+            raise ValueError('"identity" must be a number from 0 to 100')
+
+    def _gapCeiling(self) -> float:
+        message: str = "_gapCeiling not defined for parent class NW."
+        raise NotImplementedError(message)
+
+    def _limit(self) -> LIMIT | None:
+        """
+        Return what a fill needs to stop early, or None if it may not.
+
+        A banded fill only sees paths inside its band, so the bound of
+        its rows says nothing about paths that leave it; those pairs are
+        rejected once their score is known.
+        """
+        if self.cutoff is None or self._bounds is not None:
+            return None
+        best: float = max(self.submatrix.values())
+        return self.cutoff, best, self._gapCeiling()
+
+    def _abandon(self, i: int, cells: Iterable[float], limit: LIMIT) -> None:
+        """
+        Raise Rejected if no path through row i can reach the cutoff.
+
+        Every path crosses every row, so no final score beats the best
+        over row i of a cell's score plus the most the residues after it
+        can add: best per residue pair and the gap ceiling per gap
+        column, the two extremes being all pairs or all gaps.
+        """
+        cutoff, best, step = limit
+        rows: int = self.seq1.getLength() - i
+        cols: int = self.seq2.getLength()
+        bound: float = NEG_INF
+        for j, value in enumerate(cells):
+            left: int = cols - j
+            rest: float = max(
+                min(rows, left) * best + abs(rows - left) * step,
+                (rows + left) * step,
+            )
+            if value + rest > bound:
+                bound = value + rest
+        if round(bound, 1) < cutoff:
+            raise Rejected(bound)
+
+    def _screen(self, result: RESULT) -> RESULT:
+        """Return result, or the rejected result if it is below a cutoff."""
+        stats: list[float] = result[0]
+        if self.cutoff is not None and stats[5] < self.cutoff:
+            return REJECTED, ("", ""), "score below cutoff"  # type: ignore
+        if self.identity is not None and stats[1] < self.identity:
+            return REJECTED, ("", ""), "identity below cutoff"  # type: ignore
+        return result
+
+    def _unreachable(self) -> RESULT | None:
+        """
+        Return the rejected result if the lengths alone miss the identity.
+
+        A path has at most as many matches as the shorter sequence has
+        residues, which caps the percent identity _summarize reports, so
+        such a pair is rejected without a fill.
+        """
+        if self.identity is None:
+            return None
+        len1: int = self.seq1.getLength()
+        len2: int = self.seq2.getLength()
+        if not len1 + len2:
+            return None
+        ceiling: int = round(min(len1, len2) / ((len1 + len2) / 2) * 100)
+        if ceiling < self.identity:
+            return REJECTED, ("", ""), "identity below cutoff"  # type: ignore
+        return None
+
+    def _newMatrix(self, nrows: int, ncols: int, fill: float) -> Matrix:
+        """Return empty Matrix, restricted to the current band if any."""
+        if self._bounds is None:
+            if self.scratch is not None:
+                return MappedMatrix(nrows, ncols, self.scratch)
+            return Matrix(nrows, ncols)
+        lo, hi = self._bounds
+        return BandMatrix(nrows, ncols, lo, hi, fill)
+
     def _createMatrix(
         self, nrows: int, ncols: int, valueType: str, matType: str
     ) -> Matrix:
         message: str = "_createMatrix not defined for parent class NW."
         raise NotImplementedError(message)
 
-    def _reverseSeqs(self, seq1: str, seq2: str) -> tuple[str, str]:
-        """Reverse annotated sequences."""
-        seq1 = seq1[::-1]
-        seq2 = seq2[::-1]
-        alignment: tuple[str, str] = seq1, seq2
-        return alignment
+    def _align(self) -> tuple[bytes, float]:
+        message: str = "_align not defined for parent class NW."
+        raise NotImplementedError(message)
 
-    def _annotate(self, alignment: tuple[str, str]) -> str:
-        """Annotate optimal alignment."""
-        annotation: str = ""
-        seq1: str = alignment[0]
-        seq2: str = alignment[1]
-        for i in range(len(seq1)):
-            if seq1[i] == seq2[i]:
-                annotation += "|"
-            if seq1[i] != seq2[i]:
-                if seq1[i] == "-" or seq2[i] == "-":
-                    annotation += " "
-                else:
-                    annotation += "*"
-        return annotation
+    def _alignLinearSpace(self) -> bytes:
+        message: str = "_alignLinearSpace not defined for parent class NW."
+        raise NotImplementedError(message)
 
-    def _scoreAlignment(
-        self, alignment: tuple[str, str], annotation: str
-    ) -> float:
-        message: str = "_scoreAlignment not defined for parent class NW."
+    def _gapBound(self, gaps: int) -> float:
+        message: str = "_gapBound not defined for parent class NW."
+        raise NotImplementedError(message)
+
+    def _outsideBound(self, lo: int, hi: int) -> float:
+        """Return upper bound on the score of any path leaving the band."""
+        residues: int = self.seq1.getLength() + self.seq2.getLength()
+        delta: int = self.seq2.getLength() - self.seq1.getLength()
+        fewest: int = residues
+        if hi < self.seq2.getLength():
+            fewest = min(fewest, 2 * (hi + 1) - delta)
+        if lo > -self.seq1.getLength():
+            fewest = min(fewest, delta - 2 * (lo - 1))
+        best: float = max(self.submatrix.values())
+        bounds: list[float] = [
+            (residues - gaps) / 2 * best + self._gapBound(gaps)
+            for gaps in (fewest, residues)
+        ]
+        return max(bounds)
+
+    def _alignBanded(self) -> bytes:
+        """
+        Return moves of an optimal path computed in a widening band.
+
+        Only cells with lo <= col - row <= hi are filled, where the band
+        spans the main diagonal, the end cell and band cells on either
+        side. A path that leaves the band needs a known minimum number
+        of gaps, which caps its score; while the band's optimum does not
+        beat that cap the band is doubled. Once it does, every optimal
+        path lies inside the band and the traceback is the one the full
+        matrices give.
+        """
+        delta: int = self.seq2.getLength() - self.seq1.getLength()
+        band: int = max(self.band, 1)
+        moves: bytes = b""
+        while True:
+            lo: int = min(0, delta) - band
+            hi: int = max(0, delta) + band
+            if lo <= -self.seq1.getLength() and hi >= self.seq2.getLength():
+                moves = self._align()[0]
+                break
+            self._bounds = lo, hi
+            moves, score = self._align()
+            self._bounds = None
+            if score > self._outsideBound(lo, hi) + EPSILON:
+                break
+            band *= 2
+        return moves
+
+    def _alignment(self) -> bytes:
+        """Return moves of an optimal path in the configured space and band."""
+        if self.space == "linear":
+            return self._alignLinearSpace()
+        if self.band:
+            return self._alignBanded()
+        return self._align()[0]
+
+    def _scorePath(self, indels: int, gaps: int, subs: float) -> float:
+        message: str = "_scorePath not defined for parent class NW."
         raise NotImplementedError(message)
 
-    def _calcIndels(self, annotation: str) -> int:
-        """Calculate the number of indels."""
-        count: int = 0
+    def _collect(self, moves: bytes) -> RESULT:
+        """
+        Return statistics, alignment and annotation of a path in one pass.
+
+        moves holds DIAGONAL, LEFT (gap in seq2) and UP (gap in seq1)
+        codes from the first cell to the last. Aligned rows and the
+        annotation are gathered in lists and joined once, while matches,
+        indels (runs of gap columns), gap columns and the substitution
+        total are counted on the way.
+        """
+        text1: str = self.seq1.seqStr
+        text2: str = self.seq2.seqStr
+        codes1, codes2, rows = self._encoded()
+        out1: list[str] = list()
+        out2: list[str] = list()
+        marks: list[str] = list()
+        matches: int = 0
+        indels: int = 0
+        gaps: int = 0
+        subs: float = 0
+        inGap: bool = False
         i: int = 0
-        stop: int = len(annotation)
-        while i < stop:
-            char: str = annotation[i]
-            if char == " ":
-                while char == " " and i < stop:
-                    char = annotation[i]
-                    i += 1
-                count += 1
-            else:
+        j: int = 0
+        for move in moves:
+            if move == DIAGONAL:
+                base1: str = text1[i]
+                base2: str = text2[j]
+                out1.append(base1)
+                out2.append(base2)
+                subs += rows[i][codes2[j]]
+                if base1 == base2:
+                    matches += 1
+                    marks.append("|")
+                else:
+                    marks.append("*")
                 i += 1
-        return count
-
-    def _calcAvgIndel(self, annotation: str) -> float:
-        """Calculate average indel length."""
-        count: int = 0
-        counts: list[int] = list()
-        for i in range(len(annotation)):
-            if annotation[i] == " ":
-                count += 1
+                j += 1
+                inGap = False
+                continue
+            if move == UP:
+                out1.append("-")
+                out2.append(text2[j])
+                j += 1
             else:
-                if count != 0:
-                    counts.append(count)
-                count = 0
-        avgIndel: float = sum(counts) / len(counts)
-        return avgIndel
-
-    def _calcStats(
-        self, alignment: tuple[str, str], annotation: str
+                out1.append(text1[i])
+                out2.append("-")
+                i += 1
+            marks.append(" ")
+            gaps += 1
+            if not inGap:
+                indels += 1
+                inGap = True
+        alignment: tuple[str, str] = "".join(out1), "".join(out2)
+        avgIndel: float = gaps / indels if indels else 0.0
+        score: float = self._scorePath(indels, gaps, subs)
+        stats: list[float] = self._summarize(
+            matches, indels, avgIndel, len(moves), score
+        )
+        return stats, alignment, "".join(marks)
+
+    def _summarize(
+        self,
+        matches: int,
+        indels: int,
+        avgIndel: float,
+        length: int,
+        score: float,
     ) -> list[float]:
-        """Calculate alignment statistics."""
-        score: float = self._scoreAlignment(alignment, annotation)
-        matches: int = annotation.count("|")
-        indels: int = self._calcIndels(annotation)
-        avgIndel: float = self._calcAvgIndel(annotation)
+        """Return alignment statistics in output order."""
         avgLength: float = (self.seq1.getLength() + self.seq2.getLength()) / 2
         percentId: int = round((matches / avgLength) * 100)
         stats: list[float] = [
@@ -155,14 +531,121 @@ class NW:
             percentId,
             indels,
             round(avgIndel, ndigits=1),
-            len(annotation),
+            length,
             round(score, ndigits=1),
         ]
         return stats
 
-    def execute(self, num: int, printOutput: int, path: str) -> None:
+    def _scoreRows(self) -> tuple[int, int, int, float]:
+        message: str = "_scoreRows not defined for parent class NW."
+        raise NotImplementedError(message)
+
+    def calcScore(self) -> list[float]:
+        """
+        Return alignment statistics without building the alignment.
+
+        Only two rows of the DP are kept. Each cell carries the matches,
+        diagonal moves, gap runs and score of the path its traceback
+        pointers lead to, so the statistics are those execute reports
+        for the same pair.
+        """
+        with self._phase("fill"):
+            matches, diagonals, indels, score = self._scoreRows()
+        self._count(self.seq1.getLength() + 1, self.seq2.getLength() + 1, [])
+        residues: int = self.seq1.getLength() + self.seq2.getLength()
+        gaps: int = residues - 2 * diagonals
+        avgIndel: float = gaps / indels if indels else 0.0
+        stats: list[float] = self._summarize(
+            matches, indels, avgIndel, residues - diagonals, score
+        )
+        return stats
+
+    def execute(self, num: int, printOutput: int, path: str | Writer) -> None:
         print("Error: execute note defined for parent class NW.")
 
+    def executeScore(
+        self, num: int, printOutput: int, path: str | Writer
+    ) -> None:
+        """Run Needleman-Wunsch algorithm for statistics only."""
+        stats: list[float] = self.report("score")[0]
+        alignment: tuple[str, str] = "", ""
+        if printOutput:
+            self._print(num, stats, alignment, "")
+        else:
+            with self._output(path) as writer:
+                self._write(num, stats, alignment, "", writer)
+        self._finish(num)
+
+    def _output(self, path: str | Writer) -> ContextManager[Writer]:
+        """
+        Return context giving the Writer of path.
+
+        path is an output file, opened here for this call, or a Writer
+        the caller keeps open across calls, which is used as it is.
+        """
+        if isinstance(path, Writer):
+            return nullcontext(path)
+        return Writer(path)
+
+    def _report(self) -> RESULT:
+        """Return statistics, alignment and annotation."""
+        moves: bytes = self._alignment()
+        with self._phase("stats"):
+            result: RESULT = self._collect(moves)
+        return result
+
+    def report(
+        self, mode: str = "alignment"
+    ) -> tuple[list[float], tuple[str, str], str]:
+        """
+        Return what execute (or executeScore, if mode is "score") writes.
+
+        With a cache set, a result stored for the same sequences, matrix,
+        penalties and space mode is returned without aligning. With a
+        cutoff set, a pair scoring below it gets REJECTED statistics and
+        no alignment, and its fill stops as soon as that is certain. An
+        identity set rejects pairs the same way once their statistics
+        are known, or before the fill if their lengths rule it out.
+        """
+        if self.cache is None:
+            return self._compute(mode)
+        key: str = self._cacheKey(mode)
+        result: RESULT | None = self.cache.get(key)
+        if result is None:
+            result = self._compute(mode)
+            self.cache.put(key, result)
+        return result
+
+    def _cacheKey(self, mode: str) -> str:
+        """Return cache key of the result of mode."""
+        if self.cutoff is not None:
+            mode = f"{mode}/cutoff={self.cutoff!r}"
+        if self.identity is not None:
+            mode = f"{mode}/identity={self.identity!r}"
+        return self.cache.key(  # type: ignore
+            f"{type(self).__name__}/{self.space}",
+            self.seq1.seqStr,
+            self.seq2.seqStr,
+            self.submatrix,
+            self.gap,
+            self.extend,
+            mode,
+        )
+
+    def _compute(self, mode: str) -> RESULT:
+        """Return statistics, alignment and annotation for mode."""
+        rejected: RESULT | None = self._unreachable()
+        if rejected is not None:
+            return rejected
+        try:
+            if mode == "score":
+                result: RESULT = self.calcScore(), ("", ""), ""
+            else:
+                result = self._report()
+        except Rejected:
+            return REJECTED, ("", ""), "score below cutoff"  # type: ignore
+        return self._screen(result)
+
     def _print(
         self,
         num: int,
@@ -170,13 +653,20 @@ class NW:
         alignment: tuple[str, str],
         annotation: str,
     ) -> None:
-        """Print optimal alignment."""
+        """Print optimal alignment, or the reason a rejected pair has none."""
         seq1: str = alignment[0]
         seq2: str = alignment[1]
         text: list[str] = [
             f"Alignment #{num}:\n",
-            f"Sequence #1: seq{num}A",
-            f"Sequence #2: seq{num}B",
+            f"Sequence #1: {self.seq1.header or f'seq{num}A'}",
+            f"Sequence #2: {self.seq2.header or f'seq{num}B'}",
+        ]
+        if stats[5] is None:  # rejected, annotation holds the reason
+            text.append(f"Rejected: {annotation}\n")
+            for i in text:
+                print(i)
+            return
+        text += [
             f"Matches: {stats[0]}",
             f"Percent identity: {stats[1]}%",
             f"Indels: number={stats[2]} mean length={stats[3]}",
@@ -202,43 +692,27 @@ class NW:
         stats: list[float],
         alignment: tuple[str, str],
         annotation: str,
-        path: str,
+        writer: Writer,
     ) -> None:
-        """Write optimal alignment."""
-        file: TextIO = open(path, "a")
-        seq1: str = alignment[0]
-        seq2: str = alignment[1]
-        text: list[str] = [
-            f"Alignment #{num}:\n",
-            f"Sequence #1: seq{num}A",
-            f"Sequence #2: seq{num}B",
-            f"Matches: {stats[0]}",
-            f"Percent identity: {stats[1]}%",
-            f"Indels: number={stats[2]} mean length={stats[3]}",
-            f"Alignment length: {stats[4]}",
-            f"Score={stats[5]}\n",
-        ]
-        for i in text:
-            file.write(i + "\n")
-
-        limit: int = 60
-        for j in range(0, len(seq1), limit):
-            stop: int = j + limit
-            line: str = (
-                f"{seq1[j:stop]}\n{annotation[j:stop]}\n{seq2[j:stop]}\n\n"
-            )
-            file.write(line)
-        file.close()
+        """Write optimal alignment through writer."""
+        with self._phase("write"):
+            headers: tuple[str, str] = self.seq1.header, self.seq2.header
+            writer.write(num, stats, alignment, annotation, headers)
 
 
 class Linear(NW):
     """A class to represent linear scoring global alignment."""
 
     def __init__(
-        self, seq1: Sequence, seq2: Sequence, submatrix: SUB_MATRIX, gap: float
+        self,
+        seq1: Sequence,
+        seq2: Sequence,
+        submatrix: SUB_MATRIX,
+        gap: float,
+        profile: QueryProfile | None = None,
     ) -> None:
         """Construct all attributes for Linear."""
-        super().__init__(seq1, seq2, submatrix, gap)
+        super().__init__(seq1, seq2, submatrix, gap, profile)
 
     def _initScore(self, score: Matrix) -> Matrix:
         """Return initialized linear score matrix."""
@@ -250,18 +724,19 @@ class Linear(NW):
 
     def _initTrace(self, traceback: Matrix) -> Matrix:
         """Return initialized linear traceback matrix."""
-        traceback.setValue("STOP", 0, 0)
-        for i in range(1, traceback.ncols):
-            traceback.setValue("LEFT", 0, i)
-        for j in range(1, traceback.nrows):
-            traceback.setValue("UP", j, 0)
+        traceback.setValue(STOP, 0, 0)
+        for i in range(1, traceback.ncols):  # first row consumes seq2
+            traceback.setValue(UP, 0, i)
+        for j in range(1, traceback.nrows):  # first column consumes seq1
+            traceback.setValue(LEFT, j, 0)
         return traceback
 
     def _createMatrix(
         self, nrows: int, ncols: int, valueType: str, matType: str
     ) -> Matrix:
         """Return initialized score matrix."""
-        matrix: Matrix = Matrix(nrows, ncols)
+        fill: float = NEG_INF if matType == "score" else STOP
+        matrix: Matrix = self._newMatrix(nrows, ncols, fill)
         matrix.initialize(valueType)
         match matType:
             case "score":
@@ -270,168 +745,363 @@ class Linear(NW):
                 matrix = self._initTrace(matrix)
         return matrix
 
-    def _traceValue(self, scores: list[float], maxScore: float) -> str:
+    def _traceValue(self, scores: list[float], maxScore: float) -> int:
         """Return value for traceback matrix."""
         if maxScore == scores[0]:
-            return "DIAGONAL"
+            return DIAGONAL
         if maxScore == scores[1]:
-            return "LEFT"
-        if maxScore == scores[2]:
-            return "UP"
-        return "ERROR"
+            return LEFT
+        return UP
 
     def _fillMatrices(self, score: Matrix, traceback: Matrix) -> list[Matrix]:
-        """Fill score and traceback matrices."""
+        """
+        Fill score and traceback matrices.
+
+        With a cutoff set, the fill stops at the first row, of every
+        CHECK, that no path can beat it from.
+        """
+        codes1, codes2, rows = self._encoded()
+        limit: LIMIT | None = self._limit()
         for i in range(1, score.nrows):
-            for j in range(1, score.ncols):
-                base1: str = self.seq1.getBase(i - 1)
-                base2: str = self.seq2.getBase(j - 1)
-                key: tuple[str, str] = base1, base2
+            span: range = score.span(i)
+            subs: list[int] = rows[i - 1]
+            for j in range(max(1, span.start), span.stop):
+                sub: int = subs[codes2[j - 1]]
                 scores: list[float] = [
-                    score.getValue(i - 1, j - 1) + self.submatrix[key],  # type: ignore
-                    score.getValue(i - 1, j) + self.gap,  # type: ignore
-                    score.getValue(i, j - 1) + self.gap,  # type: ignore
+                    score.getCell(i - 1, j - 1) + sub,  # type: ignore
+                    score.getCell(i - 1, j) + self.gap,  # type: ignore
+                    score.getCell(i, j - 1) + self.gap,  # type: ignore
                 ]
                 maxScore: float = max(scores)
-                score.setValue(maxScore, i, j)
-                traceValue: str = self._traceValue(scores, maxScore)
-                traceback.setValue(traceValue, i, j)
+                score.setCell(maxScore, i, j)
+                traceValue: int = self._traceValue(scores, maxScore)
+                traceback.setCell(traceValue, i, j)
+            if limit is not None and i % CHECK == 0:
+                self._abandon(i, score.row(i), limit)  # type: ignore
         matrices: list[Matrix] = [score, traceback]
         return matrices
 
-    def _reverseSeqs(self, seq1: str, seq2: str) -> tuple[str, str]:
-        """Reverse annotated sequences."""
-        seq1 = seq1[::-1]
-        seq2 = seq2[::-1]
-        alignment: tuple[str, str] = seq1, seq2
-        return alignment
-
-    def _getTraceback(self, traceback: Matrix) -> tuple[str, str]:
-        """Get traceback for optimal alignment."""
-        seq1: str = ""
-        seq2: str = ""
+    def _fillVectorized(self, nrows: int, ncols: int) -> tuple[Matrix, float]:
+        """Fill traceback matrix with the NumPy anti-diagonal engine."""
+        import engine
+
+        traceback: Matrix = self._newMatrix(nrows, ncols, STOP)
+        score, traceback.matrix = engine.fillLinear(
+            *self._encoded(True),
+            self.gap,
+            self._bounds,
+            self.scratch,
+            self._limit(),
+        )
+        return traceback, score
+
+    def _getTraceback(self, traceback: Matrix) -> bytes:
+        """Return moves of the optimal path, first cell first."""
+        moves: bytearray = bytearray()
         i: int = self.seq1.getLength()
         j: int = self.seq2.getLength()
-        pointer: str = traceback.getValue(i, j)  # type: ignore
         while i > 0 or j > 0:
-            match pointer:
-                case "DIAGONAL":
-                    seq1 += self.seq1.getBase(i - 1)
-                    seq2 += self.seq2.getBase(j - 1)
-                    i -= 1
-                    j -= 1
-                case "UP":
-                    seq1 += "-"
-                    seq2 += self.seq2.getBase(j - 1)
-                    j -= 1
-                case "LEFT":
-                    seq1 += self.seq1.getBase(i - 1)
-                    seq2 += "-"
-                    i -= 1
-            pointer = traceback.getValue(i, j)  # type: ignore
-        alignment: tuple[str, str] = self._reverseSeqs(seq1, seq2)
-        return alignment
-
-    def _scoreAlignment(
-        self, alignment: tuple[str, str], annotation: str
-    ) -> float:
-        """Calculate score for global alignment."""
-        seq1: str = alignment[0]
-        seq2: str = alignment[1]
-        score: float = 0
-        for i in range(len(annotation)):
-            char: str = annotation[i]
-            if char == "|" or char == "*":
-                key: tuple[str, str] = seq1[i], seq2[i]
-                score += self.submatrix[key]
+            pointer: int = traceback.getCell(i, j)  # type: ignore
+            if pointer == DIAGONAL:
+                i -= 1
+                j -= 1
+            elif pointer == UP:
+                j -= 1
             else:
-                if char == " ":
-                    score += self.gap
-        return score
-
-    def execute(self, num: int, printOutput: int, path: str) -> None:
-        """Run Needleman-Wunsch algorithm with linear scoring."""
+                pointer = LEFT
+                i -= 1
+            moves.append(pointer)
+        moves.reverse()
+        return moves
+
+    def _align(self) -> tuple[bytes, float]:
+        """Return optimal path moves and score from score and traceback."""
         nrows: int = self.seq1.getLength() + 1
         ncols: int = self.seq2.getLength() + 1
-        score: Matrix = self._createMatrix(nrows, ncols, "integer", "score")
-        traceback: Matrix = self._createMatrix(
-            nrows, ncols, "string", "traceback"
+        if self.engine == "numpy":
+            with self._phase("fill"):
+                traceback, best = self._fillVectorized(nrows, ncols)
+            matrices: list[Matrix] = [traceback]
+        else:
+            with self._phase("create"):
+                score: Matrix = self._createMatrix(
+                    nrows, ncols, "integer", "score"
+                )
+                traceback = self._createMatrix(
+                    nrows, ncols, "byte", "traceback"
+                )
+            with self._phase("fill"):
+                traceback = self._fillMatrices(score, traceback)[1]
+            best = score.getValue(nrows - 1, ncols - 1)  # type: ignore
+            matrices = [score, traceback]
+        self._count(nrows, ncols, matrices)
+        with self._phase("traceback"):
+            moves: bytes = self._getTraceback(traceback)
+        return moves, best
+
+    def _crossColumn(self, r0: int, r1: int, c0: int, c1: int) -> int:
+        """
+        Return column where the traceback of a block enters its middle row.
+
+        Scores of the block spanning rows r0..r1 and columns c0..c1 are
+        computed two rows at a time. Below the middle row every cell also
+        carries the column at which its own traceback would first reach
+        the middle row, following the DIAGONAL > LEFT > UP preference of
+        _traceValue, so the column found for (r1, c1) is exactly where the
+        full-matrix traceback crosses. The numpy engine runs the same
+        scan one anti-diagonal at a time (engine.crossLinear).
+        """
+        mid: int = (r0 + r1) // 2
+        if self.engine == "numpy":
+            import engine
+
+            codes1, codes2, rows = self._encoded(True)
+            return c0 + engine.crossLinear(
+                codes1[r0:r1], codes2[c0:c1], rows[r0:r1], self.gap, mid - r0
+            )
+        codes1, codes2, rows = self._encoded()
+        gap: float = self.gap
+        width: int = c1 - c0
+        prev: list[float] = [k * gap for k in range(width + 1)]
+        cross: list[int] = list(range(c0, c1 + 1))
+        for i in range(r0 + 1, r1 + 1):
+            subs: list[int] = rows[i - 1]
+            current: list[float] = [(i - r0) * gap] * (width + 1)
+            below: bool = i > mid
+            nextCross: list[int] = cross[:]
+            for k in range(1, width + 1):
+                diag: float = prev[k - 1] + subs[codes2[c0 + k - 1]]
+                left: float = prev[k] + gap
+                up: float = current[k - 1] + gap
+                maxScore: float = max(diag, left, up)
+                current[k] = maxScore
+                if below:
+                    if maxScore == diag:
+                        nextCross[k] = cross[k - 1]
+                    elif maxScore != left:
+                        nextCross[k] = nextCross[k - 1]
+            prev = current
+            cross = nextCross
+        return cross[width]
+
+    def _hirschberg(
+        self, r0: int, r1: int, c0: int, c1: int, pieces: list[bytes]
+    ) -> None:
+        """Append linear-space path moves of a block to pieces."""
+        if r1 - r0 < 2 or (r1 - r0) * (c1 - c0) <= BLOCK:
+            block: Linear = Linear(
+                Sequence(self.seq1.seqStr[r0:r1]),
+                Sequence(self.seq2.seqStr[c0:c1]),
+                self.submatrix,
+                self.gap,
+            )
+            block.engine = self.engine
+            block.metrics = self.metrics
+            pieces.append(block._align()[0])
+            return
+        mid: int = (r0 + r1) // 2
+        with self._phase("fill"):
+            col: int = self._crossColumn(r0, r1, c0, c1)
+        self._count(r1 - r0 + 1, c1 - c0 + 1, [])
+        self._hirschberg(r0, mid, c0, col, pieces)
+        self._hirschberg(mid, r1, col, c1, pieces)
+
+    def _alignLinearSpace(self) -> bytes:
+        """Return optimal path moves in linear space (Hirschberg)."""
+        pieces: list[bytes] = list()
+        self._hirschberg(
+            0, self.seq1.getLength(), 0, self.seq2.getLength(), pieces
         )
-        matrices: list[Matrix] = self._fillMatrices(score, traceback)
-        alignment: tuple[str, str] = self._getTraceback(matrices[1])
-        annotation: str = self._annotate(alignment)
-        stats: list[float] = self._calcStats(alignment, annotation)
+        return b"".join(pieces)
+
+    def _gapBound(self, gaps: int) -> float:
+        """Return highest score of gaps gap columns."""
+        return gaps * self.gap
+
+    def _gapCeiling(self) -> float:
+        """Return highest score of one gap column."""
+        return self.gap
+
+    def _scoreRows(self) -> tuple[int, int, int, float]:
+        """Return matches, diagonals, indels and score of optimal path."""
+        if self.engine == "numpy":
+            import engine
+
+            return engine.scoreLinear(
+                *self._encoded(True), self.gap, self._limit()
+            )
+        codes1, codes2, rows = self._encoded()
+        limit: LIMIT | None = self._limit()
+        gap: float = self.gap
+        # cell: score, matches, diagonals, indels, path score, ends in gap
+        total: float = 0
+        prev: list[tuple] = [(0, 0, 0, 0, total, False)]
+        for k in range(1, len(codes2) + 1):
+            total += gap
+            prev.append((k * gap, 0, 0, 1, total, True))
+        edge: float = 0
+        for i in range(1, len(codes1) + 1):
+            code1: int = codes1[i - 1]
+            subs: list[int] = rows[i - 1]
+            edge += gap
+            current: list[tuple] = [(i * gap, 0, 0, 1, edge, True)]
+            for k in range(1, len(codes2) + 1):
+                code2: int = codes2[k - 1]
+                sub: int = subs[code2]
+                d: tuple = prev[k - 1]
+                l: tuple = prev[k]
+                u: tuple = current[k - 1]
+                diag: float = d[0] + sub
+                left: float = l[0] + gap
+                up: float = u[0] + gap
+                maxScore: float = max(diag, left, up)
+                if maxScore == diag:
+                    cell: tuple = (
+                        maxScore,
+                        d[1] + (code1 == code2),
+                        d[2] + 1,
+                        d[3],
+                        d[4] + sub,
+                        False,
+                    )
+                else:
+                    src: tuple = l if maxScore == left else u
+                    cell = (
+                        maxScore,
+                        src[1],
+                        src[2],
+                        src[3] + (not src[5]),
+                        src[4] + gap,
+                        True,
+                    )
+                current.append(cell)
+            prev = current
+            if limit is not None and i % CHECK == 0:
+                self._abandon(i, [cell[0] for cell in current], limit)
+        last: tuple = prev[-1]
+        return last[1], last[2], last[3], last[4]
+
+    def _scorePath(self, indels: int, gaps: int, subs: float) -> float:
+        """Return linear score of a path."""
+        score: float = subs
+        if gaps:  # a gapless path keeps an int total, as printed before
+            score += gaps * self.gap
+        return score
+
+    def execute(self, num: int, printOutput: int, path: str | Writer) -> None:
+        """
+        Run Needleman-Wunsch algorithm with linear scoring.
+
+        path is an output file or an open Writer (see _output).
+        """
+        stats, alignment, annotation = self.report()
         if printOutput:
             self._print(num, stats, alignment, annotation)
         else:
-            self._write(num, stats, alignment, annotation, path)
+            with self._output(path) as writer:
+                self._write(num, stats, alignment, annotation, writer)
+        self._finish(num)
 
 
 class Affine(NW):
     """A class to represent affine scoring global alignment."""
 
     def __init__(
-        self, seq1: Sequence, seq2: Sequence, submatrix: SUB_MATRIX, gap: float
+        self,
+        seq1: Sequence,
+        seq2: Sequence,
+        submatrix: SUB_MATRIX,
+        gap: float,
+        profile: QueryProfile | None = None,
     ) -> None:
         """Construct all attributes for Affine."""
-        super().__init__(seq1, seq2, submatrix, gap)
+        super().__init__(seq1, seq2, submatrix, gap, profile)
+        self.checkpoint = None
+        self.interval = INTERVAL
+        self._origin: int = M_STATE  # state the alignment starts in
+        self._end: int | None = None  # state it must end in, if forced
+
+    @property
+    def checkpoint(self) -> str | None:
+        """Directory where Python fills save their frontier (None disables)."""
+        return self._checkpoint
+
+    @checkpoint.setter
+    def checkpoint(self, checkpoint: str | None) -> None:
+        if checkpoint is None or isinstance(checkpoint, str):
+            self._checkpoint = checkpoint
+        else:
+            raise ValueError('"checkpoint" must be a str or None')
+
+    @property
+    def interval(self) -> float:
+        """Seconds between checkpoints of a fill."""
+        return self._interval
+
+    @interval.setter
+    def interval(self, interval: float) -> None:
+        if isinstance(interval, (int, float)) and interval >= 0:
+            self._interval = float(interval)
+        else:
+            raise ValueError('"interval" must be a non-negative number')
+
+    def _originScore(self, origin: int, state: int) -> float:
+        """Return score of state at the origin cell."""
+        if origin == state:
+            return 0.0
+        return NEG_INF
+
+    def _leadingGap(self, origin: int, length: int, state: int) -> float:
+        """Return score of a leading gap of length in state I or D."""
+        if origin == state:
+            return self.extend + ((length - 1) * self.extend)
+        if origin == M_STATE:
+            return self.gap + ((length - 1) * self.extend)
+        return NEG_INF
 
     def _initM(self, score: Matrix) -> Matrix:
         """Return initialized M matrix."""
+        score.setValue(self._originScore(self._origin, M_STATE), 0, 0)
         for i in range(1, score.ncols):  # first row
-            score.setValue(self.gap + (i * self.extend), 0, i)
+            score.setValue(NEG_INF, 0, i)
         for j in range(1, score.nrows):  # first column
-            score.setValue(self.gap + (j * self.extend), j, 0)
+            score.setValue(NEG_INF, j, 0)
         return score
 
     def _initI(self, score: Matrix) -> Matrix:
         """Return initialized I matrix."""
+        score.setValue(self._originScore(self._origin, I_STATE), 0, 0)
         for i in range(1, score.ncols):  # first row
-            score.setValue(-100000, 0, i)
-        for j in range(0, score.nrows):  # first column
-            score.setValue(self.gap + (j * self.extend), j, 0)
+            score.setValue(self._leadingGap(self._origin, i, I_STATE), 0, i)
+        for j in range(1, score.nrows):  # first column
+            score.setValue(NEG_INF, j, 0)
         return score
 
     def _initD(self, score: Matrix) -> Matrix:
         """Return initialized D matrix."""
-        for i in range(0, score.ncols):  # first row
-            score.setValue(self.gap + (i * self.extend), 0, i)
-        for j in range(0, score.nrows):  # first column
-            score.setValue(-1000000, j, 0)
+        score.setValue(self._originScore(self._origin, D_STATE), 0, 0)
+        for i in range(1, score.ncols):  # first row
+            score.setValue(NEG_INF, 0, i)
+        for j in range(1, score.nrows):  # first column
+            score.setValue(self._leadingGap(self._origin, j, D_STATE), j, 0)
         return score
 
-    def _initTM(self, trace: Matrix) -> Matrix:
-        """Return initialized M Traceback matrix."""
-        trace.setValue("STOP", 0, 0)
-        for i in range(1, trace.ncols):  # first row
-            trace.setValue("M:LEFT", 0, i)
-        for j in range(1, trace.nrows):  # first column
-            trace.setValue("M:UP", j, 0)
-        return trace
-
-    def _initTI(self, trace: Matrix) -> Matrix:
-        """Return initialized I Traceback matrix."""
-        trace.setValue("STOP", 0, 0)
-        for i in range(1, trace.ncols):  # first row
-            trace.setValue("I:LEFT", 0, i)
-        for j in range(1, trace.nrows):
-            trace.setValue("I:UP", j, 0)
-        return trace
-
-    def _initTD(self, trace: Matrix) -> Matrix:
-        """Return initialized D Traceback matrix."""
-        trace.setValue("STOP", 0, 0)
-        for i in range(1, trace.ncols):  # first row
-            trace.setValue("D:LEFT", 0, i)
-        for j in range(1, trace.nrows):  # first column
-            trace.setValue("D:UP", j, 0)
+    def _initTrace(self, trace: Matrix) -> Matrix:
+        """Return initialized packed traceback matrix."""
+        first: int = 1 if self._origin == I_STATE else 2
+        for i in range(first, trace.ncols):  # first row extends I
+            trace.setValue(I_EXTEND, 0, i)
+        first = 1 if self._origin == D_STATE else 2
+        for j in range(first, trace.nrows):  # first column extends D
+            trace.setValue(D_EXTEND, j, 0)
         return trace
 
     def _createMatrix(
         self, nrows: int, ncols: int, valueType: str, matType: str
     ) -> Matrix:
         """Return initialized score matrix."""
-        matrix: Matrix = Matrix(nrows, ncols)
+        fill: float = 0 if matType == "traceback" else NEG_INF
+        matrix: Matrix = self._newMatrix(nrows, ncols, fill)
         matrix.initialize(valueType)
         match matType:
             case "M":
@@ -440,59 +1110,53 @@ class Affine(NW):
                 matrix = self._initI(matrix)
             case "D":
                 matrix = self._initD(matrix)
-            case "TM":
-                matrix = self._initTM(matrix)
-            case "TI":
-                matrix = self._initTI(matrix)
-            case "TD":
-                matrix = self._initTD(matrix)
+            case "traceback":
+                matrix = self._initTrace(matrix)
         return matrix
 
-    def _traceM(self, scores: list[float], maxScore: float) -> str:
-        """Return value for M traceback matrix."""
+    def _traceM(self, scores: list[float], maxScore: float) -> int:
+        """Return state M was reached from."""
         if maxScore == scores[0]:
-            return "M:DIAGONAL"
+            return M_STATE
         if maxScore == scores[1]:
-            return "I:DIAGONAL"
-        if maxScore == scores[2]:
-            return "D:DIAGONAL"
-        return "ERROR"
+            return I_STATE
+        return D_STATE
+
+    def _traceStart(self, scores: list[float]) -> int:
+        """Return state where traceback starts."""
+        return self._traceM(scores, max(scores))
 
-    def _traceI(self, scores: list[float], maxScore: float) -> str:
-        """Return value for I traceback matrix."""
+    def _traceI(self, scores: list[float], maxScore: float) -> int:
+        """Return I_EXTEND if I extends I, else 0."""
         if maxScore == scores[0]:
-            return "M:UP"
-        if maxScore == scores[1]:
-            return "I:UP"
-        return "ERROR"
+            return 0
+        return I_EXTEND
 
-    def _traceD(self, scores: list[float], maxScore: float) -> str:
-        """Return value for D traceback matrix."""
+    def _traceD(self, scores: list[float], maxScore: float) -> int:
+        """Return D_EXTEND if D extends D, else 0."""
         if maxScore == scores[0]:
-            return "M:LEFT"
-        if maxScore == scores[1]:
-            return "D:LEFT"
-        return "ERROR"
+            return 0
+        return D_EXTEND
 
     def _scoreLists(
-        self, i: int, j: int, key: tuple[str, str], matrices: list[Matrix]
+        self, i: int, j: int, sub: int, matrices: list[Matrix]
     ) -> dict[str, list[float]]:
         """Return score lists for M, I, and D matrices"""
         mismatch: Matrix = matrices[0]
         insert: Matrix = matrices[1]
         delete: Matrix = matrices[2]
         mScores: list[float] = [
-            mismatch.getValue(i - 1, j - 1) + self.submatrix[key],  # type: ignore
-            insert.getValue(i - 1, j - 1) + self.submatrix[key],  # type: ignore
-            delete.getValue(i - 1, j - 1) + self.submatrix[key],  # type: ignore
+            mismatch.getCell(i - 1, j - 1) + sub,  # type: ignore
+            insert.getCell(i - 1, j - 1) + sub,  # type: ignore
+            delete.getCell(i - 1, j - 1) + sub,  # type: ignore
         ]
         iScores: list[float] = [
-            mismatch.getValue(i, j - 1) + self.gap,  # type: ignore
-            insert.getValue(i, j - 1) + self.extend,  # type: ignore
+            mismatch.getCell(i, j - 1) + self.gap,  # type: ignore
+            insert.getCell(i, j - 1) + self.extend,  # type: ignore
         ]
         dScores: list[float] = [
-            mismatch.getValue(i - 1, j) + self.gap,  # type: ignore
-            insert.getValue(i - 1, j) + self.extend,  # type: ignore
+            mismatch.getCell(i - 1, j) + self.gap,  # type: ignore
+            delete.getCell(i - 1, j) + self.extend,  # type: ignore
         ]
         scoreLists: dict[str, list[float]] = {
             "M": mScores,
@@ -513,134 +1177,444 @@ class Affine(NW):
         self, i: int, j: int, mats: list[Matrix], values: list[float]
     ) -> None:
         """Update M, I, and D score matrices."""
-        mats[0].setValue(values[0], i, j)
-        mats[1].setValue(values[1], i, j)
-        mats[2].setValue(values[2], i, j)
+        mats[0].setCell(values[0], i, j)
+        mats[1].setCell(values[1], i, j)
+        mats[2].setCell(values[2], i, j)
 
-    def _updateTraceMats(
+    def _updateTrace(
         self,
         i: int,
         j: int,
-        matrices: list[Matrix],
+        traceback: Matrix,
         scoreLists: dict[str, list[float]],
         maxScores: list[float],
     ) -> None:
-        """Update M, I, and D traceback matrices."""
-        mValue: str = self._traceM(scoreLists["M"], maxScores[0])
-        iValue: str = self._traceI(scoreLists["I"], maxScores[1])
-        dValue: str = self._traceD(scoreLists["D"], maxScores[2])
-        matrices[0].setValue(mValue, i, j)
-        matrices[1].setValue(iValue, i, j)
-        matrices[2].setValue(dValue, i, j)
+        """Pack M, I, and D pointers into the traceback matrix."""
+        mValue: int = self._traceM(scoreLists["M"], maxScores[0])
+        iValue: int = self._traceI(scoreLists["I"], maxScores[1])
+        dValue: int = self._traceD(scoreLists["D"], maxScores[2])
+        traceback.setCell(mValue | iValue | dValue, i, j)
 
     def _fillMatrices(
-        self, scoreMats: list[Matrix], traceMats: list[Matrix]
-    ) -> dict[str, list[Matrix]]:
-        """Fill score and traceback matrices."""
-        for i in range(1, scoreMats[0].nrows):
-            for j in range(1, scoreMats[0].ncols):
-                base1: str = self.seq1.getBase(i - 1)
-                base2: str = self.seq2.getBase(j - 1)
-                key: tuple[str, str] = base1, base2
+        self, scoreMats: list[Matrix], traceback: Matrix
+    ) -> list[Matrix]:
+        """
+        Fill score and traceback matrices.
+
+        With a checkpoint directory set, the fill starts after the last
+        row saved for the same problem, and saves its frontier every
+        interval seconds until the matrices are complete. With a cutoff
+        set, it stops at the first row, of every CHECK, that no path can
+        beat it from.
+        """
+        codes1, codes2, rows = self._encoded()
+        limit: LIMIT | None = self._limit()
+        checkpoint: Checkpoint | None = None
+        first: int = 1
+        if self.checkpoint is not None:
+            checkpoint = Checkpoint(
+                self.checkpoint, self._fillKey(), self.interval
+            )
+            first = self._resume(checkpoint, scoreMats, traceback) + 1
+        for i in range(first, scoreMats[0].nrows):
+            span: range = scoreMats[0].span(i)
+            subs: list[int] = rows[i - 1]
+            for j in range(max(1, span.start), span.stop):
                 scoreLists: dict[str, list[float]] = self._scoreLists(
-                    i, j, key, scoreMats
+                    i, j, subs[codes2[j - 1]], scoreMats
                 )
                 maxScores: list[float] = self._maxScores(scoreLists)
                 self._updateScoreMats(i, j, scoreMats, maxScores)
-                self._updateTraceMats(i, j, traceMats, scoreLists, maxScores)
-        matrices: dict[str, list[Matrix]] = {
-            "score": scoreMats,
-            "traceback": traceMats,
-        }
+                self._updateTrace(i, j, traceback, scoreLists, maxScores)
+            if limit is not None and i % CHECK == 0:
+                cells: map = map(max, *(score.row(i) for score in scoreMats))
+                try:
+                    self._abandon(i, cells, limit)
+                except Rejected:
+                    if checkpoint is not None:
+                        checkpoint.remove()
+                    raise
+            if checkpoint is not None and checkpoint.due():
+                frontier: list[list[float]] = [
+                    list(score.row(i)) for score in scoreMats
+                ]
+                checkpoint.save(i, frontier, traceback.matrix)  # type: ignore
+        if checkpoint is not None:
+            checkpoint.remove()
+        matrices: list[Matrix] = scoreMats + [traceback]
         return matrices
 
-    def _parseMatrix(self, pointer: str) -> str:
-        """Parse pointer for matrix."""
-        idx: int = pointer.find(":")
-        matrix: str = pointer[:idx]
-        return matrix
+    def _fillKey(self) -> str:
+        """Return hash of everything that determines the fill."""
+        problem: tuple = (
+            self.seq1.seqStr,
+            self.seq2.seqStr,
+            sorted(self.submatrix.items()),
+            self.gap,
+            self.extend,
+            self._origin,
+            self._bounds,
+        )
+        return hashlib.sha256(repr(problem).encode()).hexdigest()
+
+    def _resume(
+        self,
+        checkpoint: Checkpoint,
+        scoreMats: list[Matrix],
+        traceback: Matrix,
+    ) -> int:
+        """
+        Restore the last saved row into the matrices and return it.
+
+        Only the frontier row of M, I and D is needed to continue the
+        fill; earlier score rows are never read again. Returns 0 when
+        nothing was saved.
+        """
+        saved: tuple | None = checkpoint.load()
+        if saved is None:
+            return 0
+        row, frontier, trace = saved
+        for score, values in zip(scoreMats, frontier):
+            cells: memoryview = score.row(row)  # type: ignore
+            for k, value in enumerate(values):
+                cells[k] = value
+        for k, line in enumerate(trace):
+            traceback.row(k)[:] = line  # type: ignore
+        return row
+
+    def _fillVectorized(
+        self, nrows: int, ncols: int
+    ) -> tuple[Matrix, list[float]]:
+        """Fill traceback matrix with the NumPy anti-diagonal engine."""
+        import engine
+
+        traceback: Matrix = self._newMatrix(nrows, ncols, STOP)
+        scores, traceback.matrix = engine.fillAffine(
+            *self._encoded(True),
+            self.gap,
+            self.extend,
+            self._origin,
+            self._bounds,
+            self.scratch,
+            self._limit(),
+        )
+        return traceback, scores
 
-    def _parseDirection(self, pointer: str) -> str:
-        """Parse pointer for direction."""
-        idx: int = pointer.find(":")
-        start: int = idx + 1
-        direction: str = pointer[start:]
-        return direction
-
-    def _getTraceback(self, traceMats: list[Matrix]) -> tuple[str, str]:
-        """Get traceback for optimal alignment."""
-        seq1: str = ""
-        seq2: str = ""
+    def _getTraceback(self, traceback: Matrix, start: int) -> bytes:
+        """Return moves of the optimal path, first cell first."""
+        moves: bytearray = bytearray()
         i: int = self.seq1.getLength()
         j: int = self.seq2.getLength()
-        pointer: str = traceMats[0].getValue(i, j)  # type: ignore
-        matrix: str = self._parseMatrix(pointer)
-        direction: str = self._parseDirection(pointer)
+        state: int = start
         while i > 0 or j > 0:
-            match direction:
-                case "DIAGONAL":
-                    seq1 += self.seq1.getBase(i - 1)
-                    seq2 += self.seq2.getBase(j - 1)
-                    i -= 1
-                    j -= 1
-                case "UP":
-                    seq1 += "-"
-                    seq2 += self.seq2.getBase(j - 1)
-                    j -= 1
-                case "LEFT":
-                    seq1 += self.seq1.getBase(i - 1)
-                    seq2 += "-"
-                    i -= 1
-            match matrix:
-                case "M":
-                    pointer = traceMats[0].getValue(i, j)  # type: ignore
-                case "I":
-                    pointer = traceMats[1].getValue(i, j)  # type: ignore
-                case "D":
-                    pointer = traceMats[2].getValue(i, j)  # type: ignore
-            matrix = self._parseMatrix(pointer)
-            direction = self._parseDirection(pointer)
-        alignment: tuple[str, str] = self._reverseSeqs(seq1, seq2)
-        return alignment
-
-    def _scoreAlignment(
-        self, alignment: tuple[str, str], annotation: str
-    ) -> float:
-        """Calculate score for global alignment."""
-        seq1: str = alignment[0]
-        seq2: str = alignment[1]
-        score: float = 0
-        for i in range(len(annotation)):
-            char: str = annotation[i]
-            if char == "|" or char == "*":
-                key: tuple[str, str] = seq1[i], seq2[i]
-                score += self.submatrix[key]
-        gaps: int = annotation.count(" ")
-        indels: int = self._calcIndels(annotation)
+            pointer: int = traceback.getCell(i, j)  # type: ignore
+            if state == M_STATE:
+                moves.append(DIAGONAL)
+                i -= 1
+                j -= 1
+                state = pointer & M_MASK
+            elif state == I_STATE:
+                moves.append(UP)
+                j -= 1
+                state = I_STATE if pointer & I_EXTEND else M_STATE
+            else:
+                moves.append(LEFT)
+                i -= 1
+                state = D_STATE if pointer & D_EXTEND else M_STATE
+        moves.reverse()
+        return moves
+
+    def _scorePath(self, indels: int, gaps: int, subs: float) -> float:
+        """Return affine score of a path."""
+        score: float = subs
         score += self.gap * indels
-        diff: int = gaps - indels
-        score += self.extend * diff
+        score += self.extend * (gaps - indels)
         return score
 
-    def execute(self, num: int, printOutput: int, path: str) -> None:
-        """Run Needleman-Wunsch algorithm with linear scoring."""
+    def _align(self) -> tuple[bytes, float]:
+        """Return optimal path moves and score from score and traceback."""
         nrows: int = self.seq1.getLength() + 1
         ncols: int = self.seq2.getLength() + 1
-        mismatch: Matrix = self._createMatrix(nrows, ncols, "integer", "M")
-        insert: Matrix = self._createMatrix(nrows, ncols, "integer", "I")
-        delete: Matrix = self._createMatrix(nrows, ncols, "integer", "D")
-        mt: Matrix = self._createMatrix(nrows, ncols, "string", "TM")
-        it: Matrix = self._createMatrix(nrows, ncols, "string", "TI")
-        dt: Matrix = self._createMatrix(nrows, ncols, "string", "TD")
-        scoreMats: list[Matrix] = [mismatch, insert, delete]
-        traceMats: list[Matrix] = [mt, it, dt]
-        matrices: dict[str, list[Matrix]] = self._fillMatrices(
-            scoreMats, traceMats
+        if self.engine == "numpy":
+            with self._phase("fill"):
+                traceback, scores = self._fillVectorized(nrows, ncols)
+            matrices: list[Matrix] = [traceback]
+        else:
+            with self._phase("create"):
+                mismatch: Matrix = self._createMatrix(
+                    nrows, ncols, "integer", "M"
+                )
+                insert: Matrix = self._createMatrix(
+                    nrows, ncols, "integer", "I"
+                )
+                delete: Matrix = self._createMatrix(
+                    nrows, ncols, "integer", "D"
+                )
+                traceback = self._createMatrix(
+                    nrows, ncols, "byte", "traceback"
+                )
+            scoreMats: list[Matrix] = [mismatch, insert, delete]
+            with self._phase("fill"):
+                matrices = self._fillMatrices(scoreMats, traceback)
+            scores = [
+                score.getValue(nrows - 1, ncols - 1)  # type: ignore
+                for score in matrices[:3]
+            ]
+        self._count(nrows, ncols, matrices)
+        start: int = self._traceStart(scores)
+        if self._end is not None:
+            start = self._end
+        with self._phase("traceback"):
+            moves: bytes = self._getTraceback(traceback, start)
+        return moves, scores[start]
+
+    def _crossPoint(
+        self, r0: int, r1: int, c0: int, c1: int, origin: int, end: int | None
+    ) -> tuple[int, int]:
+        """
+        Return column and state where a block's traceback enters mid row.
+
+        The M, I and D scores of the block spanning rows r0..r1 and
+        columns c0..c1 are computed two rows at a time. Below the middle
+        row every (cell, state) also carries the (column, state) at which
+        its own traceback first reaches the middle row, following the
+        M > I > D and open > extend preferences of the full traceback.
+        Returning the state as well as the column is what keeps a gap
+        that spans the middle row charged as one gap (Myers-Miller). The
+        numpy engine runs the same scan one anti-diagonal at a time
+        (engine.crossAffine).
+        """
+        mid: int = (r0 + r1) // 2
+        if self.engine == "numpy":
+            import engine
+
+            codes1, codes2, rows = self._encoded(True)
+            final, points = engine.crossAffine(
+                codes1[r0:r1],
+                codes2[c0:c1],
+                rows[r0:r1],
+                self.gap,
+                self.extend,
+                origin,
+                mid - r0,
+            )
+            start: int = self._traceStart(final) if end is None else end
+            return divmod(4 * c0 + points[start], 4)
+        codes1, codes2, rows = self._encoded()
+        gap: float = self.gap
+        extend: float = self.extend
+        width: int = c1 - c0
+        prevM: list[float] = [NEG_INF] * (width + 1)
+        prevI: list[float] = [
+            self._leadingGap(origin, k, I_STATE) for k in range(width + 1)
+        ]
+        prevD: list[float] = [NEG_INF] * (width + 1)
+        prevM[0] = self._originScore(origin, M_STATE)
+        prevI[0] = self._originScore(origin, I_STATE)
+        prevD[0] = self._originScore(origin, D_STATE)
+        crossM: list[int] = [4 * (c0 + k) + M_STATE for k in range(width + 1)]
+        crossI: list[int] = [4 * (c0 + k) + I_STATE for k in range(width + 1)]
+        crossD: list[int] = [4 * (c0 + k) + D_STATE for k in range(width + 1)]
+        for i in range(r0 + 1, r1 + 1):
+            subs: list[int] = rows[i - 1]
+            curM: list[float] = [NEG_INF] * (width + 1)
+            curI: list[float] = [NEG_INF] * (width + 1)
+            curD: list[float] = [NEG_INF] * (width + 1)
+            curD[0] = self._leadingGap(origin, i - r0, D_STATE)
+            below: bool = i > mid
+            if below:
+                nextM: list[int] = crossM[:]
+                nextI: list[int] = crossI[:]
+                nextD: list[int] = crossD[:]
+            for k in range(1, width + 1):
+                sub: float = subs[codes2[c0 + k - 1]]
+                fromM: float = prevM[k - 1] + sub
+                fromI: float = prevI[k - 1] + sub
+                fromD: float = prevD[k - 1] + sub
+                maxM: float = max(fromM, fromI, fromD)
+                openI: float = curM[k - 1] + gap
+                extendI: float = curI[k - 1] + extend
+                maxI: float = max(openI, extendI)
+                openD: float = prevM[k] + gap
+                extendD: float = prevD[k] + extend
+                maxD: float = max(openD, extendD)
+                curM[k] = maxM
+                curI[k] = maxI
+                curD[k] = maxD
+                if below:
+                    if maxM == fromM:
+                        nextM[k] = crossM[k - 1]
+                    elif maxM == fromI:
+                        nextM[k] = crossI[k - 1]
+                    else:
+                        nextM[k] = crossD[k - 1]
+                    if maxI == openI:
+                        nextI[k] = nextM[k - 1]
+                    else:
+                        nextI[k] = nextI[k - 1]
+                    if maxD == openD:
+                        nextD[k] = crossM[k]
+            prevM, prevI, prevD = curM, curI, curD
+            if below:
+                crossM, crossI, crossD = nextM, nextI, nextD
+        scores: list[float] = [prevM[width], prevI[width], prevD[width]]
+        state: int = self._traceStart(scores)
+        if end is not None:
+            state = end
+        point: int = [crossM, crossI, crossD][state][width]
+        return divmod(point, 4)
+
+    def _myersMiller(
+        self,
+        r0: int,
+        r1: int,
+        c0: int,
+        c1: int,
+        origin: int,
+        end: int | None,
+        pieces: list[bytes],
+    ) -> None:
+        """Append linear-space path moves of a block to pieces."""
+        if r1 - r0 < 2 or (r1 - r0) * (c1 - c0) <= BLOCK:
+            block: Affine = Affine(
+                Sequence(self.seq1.seqStr[r0:r1]),
+                Sequence(self.seq2.seqStr[c0:c1]),
+                self.submatrix,
+                self.gap,
+            )
+            block.extend = self.extend
+            block.engine = self.engine
+            block.metrics = self.metrics
+            block._origin = origin
+            block._end = end
+            pieces.append(block._align()[0])
+            return
+        mid: int = (r0 + r1) // 2
+        with self._phase("fill"):
+            col, state = self._crossPoint(r0, r1, c0, c1, origin, end)
+        self._count(r1 - r0 + 1, c1 - c0 + 1, [])
+        self._myersMiller(r0, mid, c0, col, origin, state, pieces)
+        self._myersMiller(mid, r1, col, c1, state, end, pieces)
+
+    def _alignLinearSpace(self) -> bytes:
+        """Return optimal path moves in linear space (Myers-Miller)."""
+        pieces: list[bytes] = list()
+        self._myersMiller(
+            0,
+            self.seq1.getLength(),
+            0,
+            self.seq2.getLength(),
+            self._origin,
+            self._end,
+            pieces,
         )
-        alignment: tuple[str, str] = self._getTraceback(matrices["traceback"])
-        annotation: str = self._annotate(alignment)
-        stats: list[float] = self._calcStats(alignment, annotation)
+        return b"".join(pieces)
+
+    def _gapBound(self, gaps: int) -> float:
+        """Return highest score of gaps gap columns in one or more runs."""
+        if gaps == 0:
+            return 0.0
+        return max(self.gap + ((gaps - 1) * self.extend), gaps * self.gap)
+
+    def _gapCeiling(self) -> float:
+        """Return highest score of one gap column, opened or extended."""
+        return max(self.gap, self.extend)
+
+    def _scoreRows(self) -> tuple[int, int, int, float]:
+        """Return matches, diagonals, indels and score of optimal path."""
+        if self.engine == "numpy":
+            import engine
+
+            matches, diagonals, indels, subs = engine.scoreAffine(
+                *self._encoded(True),
+                self.gap,
+                self.extend,
+                self._limit(),
+            )
+        else:
+            matches, diagonals, indels, subs = self._pathRows()
+        gaps: int = self.seq1.getLength() + self.seq2.getLength()
+        gaps -= 2 * diagonals
+        score: float = subs
+        score += self.gap * indels
+        score += self.extend * (gaps - indels)
+        return matches, diagonals, indels, score
+
+    def _pathRows(self) -> tuple[int, int, int, float]:
+        """Return matches, diagonals, indels and substitution total."""
+        codes1, codes2, rows = self._encoded()
+        limit: LIMIT | None = self._limit()
+        gap: float = self.gap
+        extend: float = self.extend
+        # cell: score, matches, diagonals, indels, substitution total
+        none: tuple = (NEG_INF, 0, 0, 0, 0)
+        width: int = len(codes2) + 1
+        prevM: list[tuple] = [(0.0, 0, 0, 0, 0)] + [none] * (width - 1)
+        prevI: list[tuple] = [none] + [
+            (self._leadingGap(M_STATE, k, I_STATE), 0, 0, 1, 0)
+            for k in range(1, width)
+        ]
+        prevD: list[tuple] = [none] * width
+        for i in range(1, len(codes1) + 1):
+            code1: int = codes1[i - 1]
+            subs: list[int] = rows[i - 1]
+            curM: list[tuple] = [none]
+            curI: list[tuple] = [none]
+            curD: list[tuple] = [
+                (self._leadingGap(M_STATE, i, D_STATE), 0, 0, 1, 0)
+            ]
+            for k in range(1, width):
+                code2: int = codes2[k - 1]
+                sub: int = subs[code2]
+                fromM: float = prevM[k - 1][0] + sub
+                fromI: float = prevI[k - 1][0] + sub
+                fromD: float = prevD[k - 1][0] + sub
+                maxM: float = max(fromM, fromI, fromD)
+                if maxM == fromM:
+                    src: tuple = prevM[k - 1]
+                elif maxM == fromI:
+                    src = prevI[k - 1]
+                else:
+                    src = prevD[k - 1]
+                match: bool = code1 == code2
+                curM.append(
+                    (maxM, src[1] + match, src[2] + 1, src[3], src[4] + sub)
+                )
+                openI: float = curM[k - 1][0] + gap
+                extendI: float = curI[k - 1][0] + extend
+                if openI >= extendI:
+                    src = curM[k - 1]
+                    curI.append((openI, src[1], src[2], src[3] + 1, src[4]))
+                else:
+                    curI.append((extendI,) + curI[k - 1][1:])
+                openD: float = prevM[k][0] + gap
+                extendD: float = prevD[k][0] + extend
+                if openD >= extendD:
+                    src = prevM[k]
+                    curD.append((openD, src[1], src[2], src[3] + 1, src[4]))
+                else:
+                    curD.append((extendD,) + prevD[k][1:])
+            prevM, prevI, prevD = curM, curI, curD
+            if limit is not None and i % CHECK == 0:
+                cells: list[float] = [
+                    max(cell[0] for cell in states)
+                    for states in zip(curM, curI, curD)
+                ]
+                self._abandon(i, cells, limit)
+        ends: list[tuple] = [prevM[-1], prevI[-1], prevD[-1]]
+        last: tuple = ends[self._traceStart([end[0] for end in ends])]
+        return last[1], last[2], last[3], last[4]
+
+    def execute(self, num: int, printOutput: int, path: str | Writer) -> None:
+        """
+        Run Needleman-Wunsch algorithm with affine scoring.
+
+        path is an output file or an open Writer (see _output).
+        """
+        stats, alignment, annotation = self.report()
         if printOutput:
             self._print(num, stats, alignment, annotation)
         else:
-            self._write(num, stats, alignment, annotation, path)
+            with self._output(path) as writer:
+                self._write(num, stats, alignment, annotation, writer)
+        self._finish(num)
@@ -0,0 +1,102 @@
+"""
+Prefilter Class.
+
+This module allows the user to estimate the percent identity of
+a pair from the k-mers its sequences share, and to skip pairs
+too dissimilar to be worth a Needleman-Wunsch fill.
+
+Classes
+-------
+Prefilter
+"""
+
+from sequence import Sequence
+
+K: int = 8  # k-mer length; lower it (3-5) for protein sequences
+ACTIONS: tuple[str, ...] = ("skip", "score")
+
+class Prefilter:
+    """A class to represent a shared k-mer screen of sequence pairs."""
+
+    def __init__(
+        self, minimum: float, k: int = K, action: str = "skip"
+    ) -> None:
+        """Construct all attributes for Prefilter."""
+        self.minimum = minimum
+        self.k = k
+        self.action = action
+        self._last: tuple[Sequence | None, frozenset[str]] = None, frozenset()
+
+    @property
+    def minimum(self) -> float:
+        """Lowest estimated percent identity of a pair that passes."""
+        return self._minimum
+
+    @minimum.setter
+    def minimum(self, minimum: float) -> None:
+        if isinstance(minimum, (int, float)) and 0 <= minimum <= 100:
+            self._minimum = float(minimum)
+        else:
+            raise ValueError('"minimum" must be a number from 0 to 100')
+
+    @property
+    def k(self) -> int:
+        """Length of the k-mers compared."""
+        return self._k
+
+    @k.setter
+    def k(self, k: int) -> None:
+        if isinstance(k, int) and k > 0:
+            self._k = k
+        else:
+            raise ValueError('"k" must be a positive int')
+
+    @property
+    def action(self) -> str:
+        """What happens to a pair below minimum ("skip" or "score")."""
+        return self._action
+
+    @action.setter
+    def action(self, action: str) -> None:
+        if action in ACTIONS:
+            self._action = action
+        else:
+            raise ValueError(f'"action" must be one of {ACTIONS}')
+
+    def sketch(self, seq: Sequence) -> frozenset[str]:
+        """Return distinct k-mers of seq."""
+        text: str = seq.seqStr
+        return frozenset(
+            text[i : i + self.k] for i in range(len(text) - self.k + 1)
+        )
+
+    def estimate(self, seq1: Sequence, seq2: Sequence) -> float | None:
+        """
+        Return estimated percent identity of a pair, or None if unknown.
+
+        A k-mer survives a residue identity p with probability p**k, so
+        the share c of the smaller sketch found in the other estimates
+        p as c**(1/k). One shared k-mer is added to the count, which
+        keeps short sequences, whose few k-mers say little, from being
+        estimated at 0. Like NW statistics, the estimate is relative to
+        the average length, which the shorter sequence caps. Sequences
+        shorter than k have no k-mers and get None. The sketch of seq1
+        is kept while seq1 repeats, as the query does.
+        """
+        if self._last[0] is not seq1:
+            self._last = seq1, self.sketch(seq1)
+        sketch1: frozenset[str] = self._last[1]
+        sketch2: frozenset[str] = self.sketch(seq2)
+        if not sketch1 or not sketch2:
+            return None
+        small, large = sorted((sketch1, sketch2), key=len)
+        share: float = (len(small & large) + 1) / (len(small) + 1)
+        len1: int = seq1.getLength()
+        len2: int = seq2.getLength()
+        scale: float = min(len1, len2) / ((len1 + len2) / 2)
+        return 100 * share ** (1 / self.k) * scale
+
+    def passes(self, seq1: Sequence, seq2: Sequence) -> bool:
+        """Return True unless the pair is estimated below minimum."""
+        estimate: float | None = self.estimate(seq1, seq2)
+        return estimate is None or estimate >= self.minimum
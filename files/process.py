@@ -6,42 +6,366 @@ Needleman-Wunsch algorithm.
 
 Functions
 ---------
+parseOptions(argv: list[str]) -> dict[str, str]:
+    Return optional "--name value" arguments.
+alignPair(task: TASK, screened: str | None = None) -> RECORD:
+    Return statistics, alignment, annotation and metrics of a pair.
+alignGroup(tasks: list[TASK]) -> list[RECORD]:
+    Return records of pairs, filled together when batching applies.
+scorePair(task: tuple[int, int]) -> tuple[int, int, float, float]:
+    Return score and percent identity of two records of one file.
+writeMatrix(seqs: list[Sequence], workers: int, outfile: str) -> None:
+    Write all-vs-all score and percent identity matrices.
 writeAlignment(argv: list[str]) -> None:
     Write alignment results.
 """
 
 import os
+import sys
+import time
+import itertools
+from typing import TextIO, Iterator
 from sequence import Sequence
 from file import MatrixFile, FastaFile
-from nw import Linear, Affine
+from nw import Linear, Affine, REJECTED
+from batch import alignBatch
+from query import QueryProfile
+from writer import Writer
+from cache import Cache
+from metrics import Metrics
+from prefilter import Prefilter
 
 SUB_MATRIX = dict[tuple[str, str], int]
+TASK = tuple[int, Sequence | None, Sequence]  # None stands for the query
+# number, statistics, alignment, annotation, metrics, prefilter action
+# ("" for a pair that passed) and FASTA headers of one pair
+RECORD = tuple[
+    int, list[float], tuple[str, str], str, dict | None, str, tuple[str, str]
+]
+OPTIONS: dict[str, str] = {
+    "engine": "python",
+    "space": "full",
+    "mode": "alignment",
+    "band": "0",
+    "workers": "1",
+    "pairs": "index",
+    "format": "text",
+    "cache": "",
+    "cache-size": "256",
+    "metrics": "",
+    "scratch": "",
+    "checkpoint": "",
+    "checkpoint-every": "300",
+    "batch": "0",
+    "cutoff": "",
+    "min-identity": "",
+    "prefilter": "",
+    "kmer": "8",
+    "prefilter-action": "skip",
+}
+PAIRS: tuple[str, ...] = ("index", "query", "all")
+WINDOW: int = 4  # pairs in flight per worker
+_SHARED: dict[str, object] = dict()  # per-process state set by _setup
+
+def parseOptions(argv: list[str]) -> dict[str, str]:
+    """Return optional "--name value" arguments."""
+    options: dict[str, str] = dict(OPTIONS)
+    extra: list[str] = argv[8:]
+    for idx in range(0, len(extra), 2):
+        name: str = extra[idx].removeprefix("--")
+        if name not in OPTIONS or idx + 1 >= len(extra):
+            raise ValueError(f"invalid option: {extra[idx]}")
+        options[name] = extra[idx + 1]
+    return options
+
+def _setup(
+    submatrix: SUB_MATRIX,
+    settings: dict[str, str],
+    query: Sequence | None,
+    records: list[Sequence] | None = None,
+) -> None:
+    """Store state shared by every pair in this process."""
+    _SHARED["submatrix"] = submatrix
+    _SHARED["settings"] = settings
+    _SHARED["profile"] = None
+    _SHARED["records"] = records
+    # Without a directory the cache only dedups pairs within the run.
+    limit: int = int(settings["cache-size"]) << 20
+    _SHARED["cache"] = Cache(settings["cache"] or None, limit)
+    _SHARED["metrics"] = Metrics() if settings["metrics"] else None
+    _SHARED["prefilter"] = None
+    if settings["prefilter"]:
+        _SHARED["prefilter"] = Prefilter(
+            float(settings["prefilter"]),
+            int(settings["kmer"]),
+            settings["prefilter-action"],
+        )
+    if query is not None:
+        _SHARED["profile"] = QueryProfile(query, submatrix)
+
+def _build(
+    seq1: Sequence, seq2: Sequence, profile: QueryProfile | None
+) -> Linear | Affine:
+    """Return Linear or Affine instance configured from the settings."""
+    submatrix: SUB_MATRIX = _SHARED["submatrix"]  # type: ignore
+    settings: dict[str, str] = _SHARED["settings"]  # type: ignore
+    gap: int = int(settings["gap"])
+    if not int(settings["score"]):
+        nw: Linear | Affine = Linear(seq1, seq2, submatrix, gap, profile)
+    else:
+        nw = Affine(seq1, seq2, submatrix, gap, profile)
+        nw.extend = float(settings["extend"])
+        nw.checkpoint = settings["checkpoint"] or None
+        nw.interval = float(settings["checkpoint-every"])
+    nw.engine = settings["engine"]
+    nw.space = settings["space"]
+    nw.band = int(settings["band"])
+    nw.scratch = settings["scratch"] or None
+    if settings["cutoff"]:
+        nw.cutoff = float(settings["cutoff"])
+    if settings["min-identity"]:
+        nw.identity = float(settings["min-identity"])
+    nw.cache = _SHARED["cache"]  # type: ignore
+    if _SHARED["records"] is None:  # all-vs-all runs are not measured
+        nw.metrics = _SHARED["metrics"]  # type: ignore
+    return nw
+
+def _screen(task: TASK) -> str:
+    """Return prefilter action taken on a pair, or "" if it passes."""
+    prefilter: Prefilter | None = _SHARED["prefilter"]  # type: ignore
+    if prefilter is None:
+        return ""
+    _, seq1, seq2 = task
+    if seq1 is None:
+        seq1 = _SHARED["profile"].query  # type: ignore
+    if prefilter.passes(seq1, seq2):
+        return ""
+    return prefilter.action
+
+def alignPair(task: TASK, screened: str | None = None) -> RECORD:
+    """
+    Return statistics, alignment, annotation and metrics of a pair.
+
+    A pair the prefilter stops is skipped, with REJECTED statistics, or
+    aligned score-only; screened is the prefilter action if known.
+    """
+    num, seq1, seq2 = task
+    settings: dict[str, str] = _SHARED["settings"]  # type: ignore
+    profile: QueryProfile | None = _SHARED["profile"]  # type: ignore
+    if seq1 is None:
+        seq1 = profile.query  # type: ignore
+    headers: tuple[str, str] = seq1.header, seq2.header  # type: ignore
+    if screened is None:
+        screened = _screen(task)
+    if screened == "skip":
+        reason: str = "estimated identity below prefilter"
+        return (  # type: ignore
+            num, REJECTED, ("", ""), reason, None, screened, headers
+        )
+    nw: Linear | Affine = _build(seq1, seq2, profile)
+    mode: str = "score" if screened == "score" else settings["mode"]
+    stats, alignment, annotation = nw.report(mode)
+    measured: dict | None = None
+    if nw.metrics is not None:
+        measured = nw.metrics.finish(num)
+    return num, stats, alignment, annotation, measured, screened, headers
+
+def alignGroup(tasks: list[TASK]) -> list[RECORD]:
+    """
+    Return records of pairs, filled together when batching applies.
+
+    Batching needs the NumPy engine, full space, no band and alignment
+    mode; otherwise the pairs are aligned one by one, as are pairs the
+    prefilter stops. A batch is measured as one metrics record, under
+    the number of its first pair.
+    """
+    settings: dict[str, str] = _SHARED["settings"]  # type: ignore
+    if (
+        not int(settings["batch"])
+        or settings["engine"] != "numpy"
+        or settings["space"] != "full"
+        or int(settings["band"])
+        or settings["mode"] != "alignment"
+    ):
+        return [alignPair(task) for task in tasks]
+    profile: QueryProfile | None = _SHARED["profile"]  # type: ignore
+    screens: list[str] = [_screen(task) for task in tasks]
+    batched: list[TASK] = [
+        task for task, screened in zip(tasks, screens) if not screened
+    ]
+    nws: list[Linear | Affine] = list()
+    for _, seq1, seq2 in batched:
+        if seq1 is None:
+            seq1 = profile.query  # type: ignore
+        nws.append(_build(seq1, seq2, profile))
+    records: list[RECORD] = list()
+    for (num, _, _), nw, result in zip(batched, nws, alignBatch(nws)):
+        stats, alignment, annotation = result
+        headers: tuple[str, str] = nw.seq1.header, nw.seq2.header
+        records.append(
+            (num, stats, alignment, annotation, None, "", headers)
+        )
+    metrics: Metrics | None = nws[0].metrics if nws else None
+    if metrics is not None and records:
+        first: RECORD = records[0]
+        records[0] = first[:4] + (metrics.finish(first[0]),) + first[5:]
+    for task, screened in zip(tasks, screens):
+        if screened:
+            records.append(alignPair(task, screened))
+    records.sort(key=lambda record: record[0])
+    return records
+
+def scorePair(task: tuple[int, int]) -> tuple[int, int, float, float]:
+    """Return score and percent identity of two records of one file."""
+    i, j = task
+    records: list[Sequence] = _SHARED["records"]  # type: ignore
+    nw: Linear | Affine = _build(records[i], records[j], None)
+    stats: list[float] = nw.report("score")[0]
+    if stats[5] is None:  # rejected below a cutoff
+        return i, j, float("nan"), float("nan")
+    return i, j, stats[5], stats[1]
+
+def writeMatrix(seqs: list[Sequence], workers: int, outfile: str) -> None:
+    """
+    Write all-vs-all score and percent identity matrices.
+
+    Only pairs i <= j are aligned, score-only, and each result fills
+    both (i, j) and (j, i). An outfile ending in ".npz" gets NumPy
+    arrays "names", "score" and "identity"; any other gets two
+    tab-separated square tables headed "score" and "identity".
+    """
+    size: int = len(seqs)
+    score: list[list[float]] = [[0.0] * size for _ in range(size)]
+    identity: list[list[float]] = [[0.0] * size for _ in range(size)]
+    tasks: Iterator[tuple[int, int]] = (
+        (i, j) for i in range(size) for j in range(i, size)
+    )
+    if workers > 1:
+        import multiprocessing
+
+        shared: tuple = (_SHARED["submatrix"], _SHARED["settings"], None, seqs)
+        with multiprocessing.Pool(workers, _setup, shared) as pool:
+            chunk: int = max(1, size * (size + 1) // (8 * workers))
+            for i, j, value, percent in pool.imap_unordered(
+                scorePair, tasks, chunk
+            ):
+                score[i][j] = score[j][i] = value
+                identity[i][j] = identity[j][i] = percent
+    else:
+        for i, j, value, percent in map(scorePair, tasks):
+            score[i][j] = score[j][i] = value
+            identity[i][j] = identity[j][i] = percent
+
+    names: list[str] = [
+        seq.header or f"seq{k + 1}" for k, seq in enumerate(seqs)
+    ]
+    if outfile.endswith(".npz"):
+        import numpy as np
+
+        np.savez_compressed(
+            outfile,
+            names=np.array(names),
+            score=np.array(score, dtype=np.float64).reshape(size, size),
+            identity=np.array(identity, dtype=np.float64).reshape(size, size),
+        )
+        return
+    file: TextIO = open(outfile, "w")
+    for label, table in (("score", score), ("identity", identity)):
+        file.write("\t".join([label] + names) + "\n")
+        for name, row in zip(names, table):
+            cells: list[str] = [name] + [str(value) for value in row]
+            file.write("\t".join(cells) + "\n")
+    file.close()
+
+def _emit(
+    writer: Writer,
+    metrics: Metrics | None,
+    record: RECORD,
+    screened: dict[str, int],
+) -> None:
+    """Write one result, timing the write and counting prefilter actions."""
+    num, stats, alignment, annotation, measured, action, headers = record
+    screened[action] = screened.get(action, 0) + 1
+    start: float = time.perf_counter()
+    writer.write(num, stats, alignment, annotation, headers)
+    if metrics is not None and measured is not None:
+        measured["phases"]["write"] += time.perf_counter() - start
+        metrics.add(measured)
 
 def writeAlignment(argv: list[str]) -> None:
     """Write alignment results."""
+    options: dict[str, str] = parseOptions(argv)
     fasta1: FastaFile = FastaFile(argv[1])
     fasta2: FastaFile = FastaFile(argv[2])
 
     mf: MatrixFile = MatrixFile(argv[3])
     submatrix: SUB_MATRIX = mf.generate()
 
-    seqs1: dict[int, Sequence] = fasta1.generate()
-    seqs2: dict[int, Sequence] = fasta2.generate()
-
     outfile: str = argv[4]
     if os.path.isfile(outfile):
             os.remove(outfile)
 
-    gap: int = int(argv[5])
-    score: int = int(argv[6])
-
-    if not score:
-        for i in range(len(seqs1)):
-            l: Linear = Linear(seqs1[i], seqs2[i], submatrix, gap)
-            l.execute(i + 1, 0, outfile)
+    settings: dict[str, str] = dict(options)
+    settings.update(gap=argv[5], score=argv[6], extend=argv[7])
+    workers: int = int(options["workers"])
+    query: Sequence | None = None
+    if options["pairs"] == "all":
+        # Every record of file 1 against every other; file 2 is unused.
+        records: list[Sequence] = list(fasta1.stream())
+        _setup(submatrix, settings, None, records)
+        writeMatrix(records, workers, outfile)
+        return
+    if options["pairs"] == "query":
+        # The first record of file 1 is aligned against all of file 2,
+        # reusing one QueryProfile per process.
+        query = next(fasta1.stream())
+        tasks: Iterator[TASK] = (
+            (num, None, seq2) for num, seq2 in enumerate(fasta2.stream(), 1)
+        )
+    elif options["pairs"] == "index":
+        # Both files are read in lockstep, one record pair at a time.
+        tasks = (
+            (num, seq1, seq2)
+            for num, (seq1, seq2) in enumerate(
+                zip(fasta1.stream(), fasta2.stream()), 1
+            )
+        )
     else:
-        for j in range(len(seqs1)):
-            a: Affine = Affine(seqs1[j], seqs2[j], submatrix, gap)
-            a.extend = float(argv[7])
-            a.execute(j + 1, 0, outfile)
-    
\ No newline at end of file
+        raise ValueError(f'"pairs" must be one of {PAIRS}')
+    # Pairs travel in groups of --batch, filled together by alignGroup.
+    batch: int = max(1, int(options["batch"]))
+    groups: Iterator[list[TASK]] = iter(
+        lambda: list(itertools.islice(tasks, batch)), []
+    )
+    writer: Writer = Writer(outfile, options["format"])
+    metrics: Metrics | None = Metrics() if options["metrics"] else None
+    screened: dict[str, int] = dict()  # pairs by prefilter action
+    with writer:
+        if workers > 1:
+            import multiprocessing
+
+            # Pool.imap reads its whole input up front, so groups are
+            # handed over in windows; imap yields in task order, which
+            # keeps "Alignment #n" sequential.
+            with multiprocessing.Pool(
+                workers, _setup, (submatrix, settings, query)
+            ) as pool:
+                size: int = WINDOW * workers
+                while window := list(itertools.islice(groups, size)):
+                    for records in pool.imap(alignGroup, window):
+                        for record in records:
+                            _emit(writer, metrics, record, screened)
+        else:
+            _setup(submatrix, settings, query)
+            for group in groups:
+                for record in alignGroup(group):
+                    _emit(writer, metrics, record, screened)
+    if metrics is not None:
+        metrics.dump(options["metrics"])
+    if options["prefilter"]:
+        total: int = sum(screened.values())
+        print(
+            f"Prefilter: {screened.get('skip', 0)} skipped and "
+            f"{screened.get('score', 0)} score-only of {total} pairs",
+            file=sys.stderr,
+        )
@@ -0,0 +1,57 @@
+"""
+QueryProfile Class.
+
+This module allows the user to precompute the substitution
+scores of one query sequence and reuse them across many targets.
+
+Classes
+-------
+QueryProfile
+"""
+
+from sequence import Sequence, SUB_MATRIX, ALPHABET, TABLE, tabulate
+
+class QueryProfile:
+    """A class to represent the query profile of a one-vs-many search."""
+
+    def __init__(self, query: Sequence, submatrix: SUB_MATRIX) -> None:
+        """Construct all attributes for QueryProfile."""
+        self.submatrix = submatrix
+        self.query = query
+
+    @property
+    def submatrix(self) -> SUB_MATRIX:
+        """Substitution matrix the profile is built from."""
+        return self._submatrix
+
+    @submatrix.setter
+    def submatrix(self, submatrix: SUB_MATRIX) -> None:
+        self._submatrix = submatrix
+        self.alphabet: ALPHABET
+        self.table: TABLE
+        self.alphabet, self.table = tabulate(submatrix)
+        if hasattr(self, "_query"):
+            self.query = self.query
+
+    @property
+    def query(self) -> Sequence:
+        """Query sequence, aligned as sequence 1 against every target."""
+        return self._query
+
+    @query.setter
+    def query(self, query: Sequence) -> None:
+        self._query = query
+        self.codes: bytes = query.encode(self.alphabet)
+        # rows[i] holds the score of query residue i against each residue.
+        self.rows: TABLE = [self.table[code] for code in self.codes]
+        self._array: object = None
+
+    def array(self) -> object:
+        """Return rows as a NumPy array, built on first use."""
+        if self._array is None:
+            import numpy as np
+
+            self._array = np.array(self.rows, dtype=np.float64).reshape(
+                len(self.rows), len(self.table)
+            )
+        return self._array
@@ -7,15 +7,54 @@ sequence from a fasta file in a Sequence instance.
 Classes
 -------
 Sequence
+
+Functions
+---------
+tabulate(submatrix: SUB_MATRIX) -> tuple[ALPHABET, TABLE]:
+    Return alphabet map and dense score table of a substitution matrix.
+register(submatrix: SUB_MATRIX, alphabet: ALPHABET, table: TABLE) -> None:
+    Record alphabet map and table of submatrix for tabulate to return.
 """
 
+SUB_MATRIX = dict[tuple[str, str], int]
+ALPHABET = dict[str, int]
+TABLE = list[list[int]]
+# id of a substitution matrix -> the matrix, its alphabet map and table
+_TABLES: dict[int, tuple[SUB_MATRIX, ALPHABET, TABLE]] = dict()
+
+def tabulate(submatrix: SUB_MATRIX) -> tuple[ALPHABET, TABLE]:
+    """
+    Return alphabet map and dense score table of a substitution matrix.
+
+    Both are built once per matrix dict, or taken from register, so
+    every pair aligned with the same matrix shares them; a dict changed
+    in place after that is not seen.
+    """
+    known: tuple | None = _TABLES.get(id(submatrix))
+    if known is not None and known[0] is submatrix:
+        return known[1], known[2]
+    alphabet: ALPHABET = dict()
+    for key in submatrix:
+        for base in key:
+            alphabet.setdefault(base, len(alphabet))
+    table: TABLE = [[0] * len(alphabet) for _ in alphabet]
+    for key, value in submatrix.items():
+        table[alphabet[key[0]]][alphabet[key[1]]] = value
+    register(submatrix, alphabet, table)
+    return alphabet, table
+
+def register(submatrix: SUB_MATRIX, alphabet: ALPHABET, table: TABLE) -> None:
+    """Record alphabet map and table of submatrix for tabulate to return."""
+    _TABLES[id(submatrix)] = submatrix, alphabet, table
+
 class Sequence:
     """A class to represent a sequence."""
 
-    def __init__(self, seq: str) -> None:
+    def __init__(self, seq: str, header: str = "") -> None:
         """Construct all attributes for Sequence."""
         self.seqStr = seq
         self.seqLst: list[str] = list(seq)
+        self.header = header
 
     @property
     def seqStr(self) -> str:
@@ -29,6 +68,18 @@ class Sequence:
         else:
             raise ValueError('"seq" must be a str')
         
+    @property
+    def header(self) -> str:
+        """Fasta header line, without the leading ">"."""
+        return self._header
+
+    @header.setter
+    def header(self, header: str) -> None:
+        if isinstance(header, str):
+            self._header = header
+        else:
+            raise ValueError('"header" must be a str')
+
     @property
     def seqLst(self) -> list[str]:
         """Sequence as list."""
@@ -54,6 +105,20 @@ class Sequence:
         base: str = self.seqStr[pos]
         return base
     
+    def encode(self, alphabet: ALPHABET) -> bytes:
+        """
+        Return Sequence as one alphabet index per residue.
+
+        Raises ValueError naming every residue missing from alphabet,
+        so a bad sequence fails before any alignment work starts.
+        """
+        unknown: set[str] = set(self.seqStr).difference(alphabet)
+        if unknown:
+            residues: str = ", ".join(sorted(unknown))
+            raise ValueError(f"residues not in substitution matrix: {residues}")
+        codes: bytes = bytes(map(alphabet.__getitem__, self.seqStr))
+        return codes
+
     def getLength(self) -> int:
         """Return Sequence length."""
         length: int = len(self.seqStr)
@@ -0,0 +1,416 @@
+"""
+Needleman-Wunsch Server.
+
+This module allows the user to keep substitution matrices and
+worker processes loaded between alignment requests. Requests are
+JSON lines on a Unix socket or a localhost TCP port; they are
+gathered into micro-batches for a process pool, and each result
+is sent back as a JSON line as soon as it is ready.
+
+Usage:
+    server.py [--socket path] [--host 127.0.0.1] [--port 8765]
+              [--workers n] [--batch 64] [--delay ms]
+              [--matrices dir] [--cache dir] [--cache-size MiB]
+              [--scratch dir] [--checkpoint dir]
+              [--checkpoint-every seconds]
+
+A request holds "id", "seq1", "seq2", "matrix" (a path inside
+--matrices), "gap", "score" and "extend", plus any main.py option
+that does not touch the file system or the whole run, by name
+("engine", "space", "mode", "band", ...). Those are fixed when the
+server starts. The reply holds the same "id" and either "stats",
+"alignment" and "annotation" or an "error".
+
+Classes
+-------
+Server
+
+Functions
+---------
+parseOptions(argv: list[str]) -> dict[str, str]:
+    Return optional "--name value" arguments.
+alignRequests(requests: list[REQUEST], fixed: dict[str, str]) -> list[REQUEST]:
+    Return one reply per request, aligning like pairs together.
+"""
+
+import os
+import sys
+import json
+import signal
+import asyncio
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+SUB_MATRIX = dict[tuple[str, str], int]
+REQUEST = dict[str, object]
+OPTIONS: dict[str, str] = {
+    "socket": "",
+    "host": "127.0.0.1",
+    "port": "8765",
+    "workers": "1",
+    "batch": "64",
+    "delay": "5",
+    "matrices": ".",
+    "cache": "",
+    "cache-size": "256",
+    "scratch": "",
+    "checkpoint": "",
+    "checkpoint-every": "300",
+}
+# Options a request may not set: they only make sense for a whole run,
+# or name files the server would read or write.
+RESERVED: tuple[str, ...] = (
+    "workers",
+    "pairs",
+    "format",
+    "metrics",
+    "cache",
+    "cache-size",
+    "scratch",
+    "checkpoint",
+    "checkpoint-every",
+)
+FIELDS: tuple[str, ...] = (
+    "id", "seq1", "seq2", "matrix", "gap", "score", "extend"
+)
+LINE: int = 1 << 26  # longest request line, in bytes
+STATES: int = 32  # settings whose process state a worker keeps
+_MATRICES: dict[str, tuple[float, SUB_MATRIX]] = dict()
+# group key -> process._SHARED set up for it, least recently used first
+_STATES: OrderedDict[tuple, dict[str, object]] = OrderedDict()
+
+def parseOptions(argv: list[str]) -> dict[str, str]:
+    """Return optional "--name value" arguments."""
+    options: dict[str, str] = dict(OPTIONS)
+    for idx in range(0, len(argv), 2):
+        name: str = argv[idx].removeprefix("--")
+        if name not in OPTIONS or idx + 1 >= len(argv):
+            raise ValueError(f"invalid option: {argv[idx]}")
+        options[name] = argv[idx + 1]
+    return options
+
+def _matrix(name: str, root: str) -> SUB_MATRIX:
+    """
+    Return substitution matrix name, parsed again only if changed.
+
+    name is resolved against root, and must stay inside it once links
+    are followed.
+    """
+    from file import MatrixFile
+
+    root = os.path.realpath(root)
+    path: str = os.path.realpath(os.path.join(root, name))
+    if os.path.commonpath([root, path]) != root:
+        raise ValueError(f"matrix {name} is outside {root}")
+    mtime: float = os.stat(path).st_mtime
+    known: tuple[float, SUB_MATRIX] | None = _MATRICES.get(path)
+    if known is None or known[0] != mtime:
+        known = mtime, MatrixFile(path).generate()
+        _MATRICES[path] = known
+    return known[1]
+
+def _settings(request: REQUEST, fixed: dict[str, str]) -> dict[str, str]:
+    """
+    Return process settings of request over the server's fixed ones.
+
+    Raises ValueError for a field that is neither in FIELDS nor a
+    process option outside RESERVED.
+    """
+    import process
+
+    settings: dict[str, str] = dict(process.OPTIONS)
+    for name in RESERVED:
+        if name in fixed:
+            settings[name] = fixed[name]
+    for name in ("gap", "score", "extend"):
+        settings[name] = str(request[name])
+    for name, value in request.items():
+        if name in process.OPTIONS and name not in RESERVED:
+            settings[name] = str(value)
+        elif name not in FIELDS:
+            raise ValueError(f"field {name!r} may not be set by a request")
+    settings["metrics"] = ""
+    return settings
+
+def _prepare(key: tuple, submatrix: SUB_MATRIX) -> None:
+    """
+    Make process state ready for the group key, set up once per worker.
+
+    The Cache, prefilter and the rest of process._SHARED are kept for
+    the STATES most recent keys, so results and cache accounting carry
+    over between micro-batches. A matrix that changed on disk is set
+    up again.
+    """
+    import process
+
+    state: dict[str, object] | None = _STATES.get(key)
+    if state is None or state["submatrix"] is not submatrix:
+        process._setup(submatrix, dict(key[1:]), None)
+        _STATES[key] = dict(process._SHARED)
+        while len(_STATES) > STATES:
+            _STATES.popitem(last=False)
+    else:
+        process._SHARED.update(state)
+        _STATES.move_to_end(key)
+
+def alignRequests(
+    requests: list[REQUEST], fixed: dict[str, str]
+) -> list[REQUEST]:
+    """
+    Return one reply per request, aligning like pairs together.
+
+    Requests with the same matrix and settings form one group, which
+    process.alignGroup aligns in a single batched fill when the
+    settings allow it. fixed holds the server options requests may not
+    change. A request that fails, whatever the error, gets an error
+    reply of its own and the rest of its group is still aligned.
+    """
+    import process
+    from sequence import Sequence
+
+    replies: dict[object, REQUEST] = dict()
+    groups: dict[tuple, list[REQUEST]] = dict()
+    for request in requests:
+        if not isinstance(request, dict):
+            replies[id(request)] = {"error": "request must be a JSON object"}
+            continue
+        try:
+            settings: dict[str, str] = _settings(request, fixed)
+            key: tuple = (str(request["matrix"]),) + tuple(settings.items())
+            for name in ("seq1", "seq2"):
+                if not isinstance(request[name], str) or not request[name]:
+                    raise ValueError(f"{name} must be a non-empty string")
+        except (KeyError, TypeError) as error:
+            replies[id(request)] = {"error": f"missing field {error}"}
+            continue
+        except ValueError as error:
+            replies[id(request)] = {"error": str(error)}
+            continue
+        groups.setdefault(key, list()).append(request)
+    for key, group in groups.items():
+        try:
+            submatrix: SUB_MATRIX = _matrix(key[0], fixed["matrices"])
+            _prepare(key, submatrix)
+            tasks: list = [
+                (k, Sequence(str(req["seq1"])), Sequence(str(req["seq2"])))
+                for k, req in enumerate(group)
+            ]
+            for record in process.alignGroup(tasks):
+                num, stats, alignment, annotation = record[:4]
+                replies[id(group[num])] = {
+                    "stats": stats,
+                    "alignment": alignment,
+                    "annotation": annotation,
+                }
+        except Exception as error:
+            # One bad pair fails its group; retry one by one to isolate it.
+            if len(group) > 1:
+                for request in group:
+                    replies[id(request)] = alignRequests([request], fixed)[0]
+                continue
+            replies[id(group[0])] = {"error": str(error) or repr(error)}
+    out: list[REQUEST] = list()
+    for request in requests:
+        reply: REQUEST = replies[id(request)]
+        reply["id"] = request.get("id") if isinstance(request, dict) else None
+        out.append(reply)
+    return out
+
+
+class Server:
+    """A class to represent a long-running alignment server."""
+
+    def __init__(self, options: dict[str, str]) -> None:
+        """Construct all attributes for Server."""
+        self.options = options
+        self._queue: asyncio.Queue | None = None
+        self._pool: ProcessPoolExecutor | None = None
+        self._running: set[asyncio.Task] = set()  # batches being aligned
+
+    @property
+    def options(self) -> dict[str, str]:
+        """Server options, as parsed by parseOptions."""
+        return self._options
+
+    @options.setter
+    def options(self, options: dict[str, str]) -> None:
+        if set(options) == set(OPTIONS):
+            self._options = options
+        else:
+            raise ValueError(f'"options" must have keys {tuple(OPTIONS)}')
+
+    async def serve(self) -> None:
+        """Accept connections until cancelled, SIGINT or SIGTERM."""
+        loop: asyncio.AbstractEventLoop = asyncio.get_running_loop()
+        main: asyncio.Task = asyncio.current_task()  # type: ignore
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(signum, main.cancel)
+        self._queue = asyncio.Queue()
+        # Workers forked from the server would inherit the sockets of the
+        # connections open at the time and keep them from closing.
+        self._pool = ProcessPoolExecutor(
+            int(self.options["workers"]),
+            multiprocessing.get_context("forkserver"),
+        )
+        batcher: asyncio.Task = asyncio.create_task(self._batch())
+        if self.options["socket"]:
+            server: asyncio.AbstractServer = await asyncio.start_unix_server(
+                self._handle, self.options["socket"], limit=LINE
+            )
+        else:
+            server = await asyncio.start_server(
+                self._handle,
+                self.options["host"],
+                int(self.options["port"]),
+                limit=LINE,
+            )
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            batcher.cancel()
+            for task in self._running:
+                task.cancel()
+            self._pool.shutdown(cancel_futures=True)
+            if self.options["socket"]:
+                os.remove(self.options["socket"])
+
+    async def _handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        """Read requests of one connection and stream back the replies."""
+        replies: set[asyncio.Task] = set()
+        while (line := await self._readLine(reader)) != b"":
+            if line is None:
+                message: str = f"request longer than {LINE} bytes"
+                self._send(writer, {"id": None, "error": message})
+                continue
+            try:
+                request: REQUEST = json.loads(line)
+            except ValueError as error:
+                self._send(writer, {"id": None, "error": str(error)})
+                continue
+            if not isinstance(request, dict):
+                message = "request must be a JSON object"
+                self._send(writer, {"id": None, "error": message})
+                continue
+            loop: asyncio.AbstractEventLoop = asyncio.get_running_loop()
+            future: asyncio.Future = loop.create_future()
+            await self._queue.put((request, future))  # type: ignore
+            task: asyncio.Task = loop.create_task(
+                self._reply(writer, future, request.get("id"))
+            )
+            replies.add(task)
+            task.add_done_callback(replies.discard)
+        if replies:
+            await asyncio.wait(replies)
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except ConnectionError:  # the client left first
+            pass
+
+    async def _readLine(self, reader: asyncio.StreamReader) -> bytes | None:
+        """
+        Return the next request line, b"" at the end, or None if too long.
+
+        A line over LINE bytes is read to its end and dropped, so the
+        next line is parsed from its start.
+        """
+        try:
+            return await reader.readuntil(b"\n")
+        except asyncio.IncompleteReadError as error:  # last line, no newline
+            return error.partial
+        except asyncio.LimitOverrunError as error:
+            consumed: int = error.consumed
+        while True:
+            await reader.readexactly(consumed)
+            try:
+                await reader.readuntil(b"\n")
+                return None
+            except asyncio.IncompleteReadError:
+                return None
+            except asyncio.LimitOverrunError as error:
+                consumed = error.consumed
+
+    async def _reply(
+        self,
+        writer: asyncio.StreamWriter,
+        future: asyncio.Future,
+        ident: object,
+    ) -> None:
+        """Send the reply of future, under ident, unless the client left."""
+        reply: REQUEST = dict(await future, id=ident)
+        if writer.is_closing():
+            return
+        self._send(writer, reply)
+        try:
+            await writer.drain()
+        except ConnectionError:
+            pass
+
+    def _send(self, writer: asyncio.StreamWriter, reply: REQUEST) -> None:
+        """Write reply as one JSON line."""
+        writer.write(json.dumps(reply).encode() + b"\n")
+
+    async def _batch(self) -> None:
+        """
+        Hand queued requests to the pool in micro-batches.
+
+        A batch closes once it holds --batch requests or --delay
+        milliseconds after its first request arrived, whichever comes
+        first, and is aligned while the next one is gathered.
+        """
+        queue: asyncio.Queue = self._queue  # type: ignore
+        size: int = int(self.options["batch"])
+        delay: float = float(self.options["delay"]) / 1000
+        loop: asyncio.AbstractEventLoop = asyncio.get_running_loop()
+        while True:
+            batch: list[tuple[REQUEST, asyncio.Future]] = [await queue.get()]
+            deadline: float = loop.time() + delay
+            while len(batch) < size:
+                try:
+                    batch.append(
+                        await asyncio.wait_for(
+                            queue.get(), max(0.0, deadline - loop.time())
+                        )
+                    )
+                except asyncio.TimeoutError:
+                    break
+            task: asyncio.Task = asyncio.create_task(self._run(batch))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    async def _run(self, batch: list[tuple[REQUEST, asyncio.Future]]) -> None:
+        """
+        Align batch in the pool and resolve the futures of its requests.
+
+        Every future is resolved, with an error reply if the pool fails
+        or the task is cancelled; _reply adds the request id.
+        """
+        loop: asyncio.AbstractEventLoop = asyncio.get_running_loop()
+        requests: list[REQUEST] = [request for request, _ in batch]
+        replies: list[REQUEST] = list()
+        try:
+            replies = await loop.run_in_executor(
+                self._pool, alignRequests, requests, self.options
+            )
+        except Exception as error:  # a worker died
+            replies = [{"error": repr(error)} for _ in batch]
+        finally:
+            for k, (_, future) in enumerate(batch):
+                if future.done():
+                    continue
+                if k < len(replies):
+                    future.set_result(replies[k])
+                else:
+                    future.set_result({"error": "request was not aligned"})
+
+
+if __name__ == "__main__":
+    options: dict[str, str] = parseOptions(sys.argv[1:])
+    try:
+        asyncio.run(Server(options).serve())
+    except asyncio.CancelledError:
+        pass
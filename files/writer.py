@@ -0,0 +1,193 @@
+"""
+Writer Class.
+
+This module allows the user to write Needleman-Wunsch results
+through one buffered file handle, as text or as TSV/JSONL
+summaries.
+
+Classes
+-------
+Writer
+"""
+
+import json
+from typing import TextIO
+
+FORMATS: tuple[str, ...] = ("text", "tsv", "jsonl")
+FIELDS: tuple[str, ...] = (
+    "matches",
+    "identity",
+    "indels",
+    "mean_indel",
+    "length",
+    "score",
+)
+BATCH: int = 64  # records held before a flush
+BUFFER: int = 1 << 20  # bytes buffered by the file handle
+
+class Writer:
+    """A class to represent an output file of alignment results."""
+
+    def __init__(
+        self, path: str, format: str = "text", batch: int = BATCH
+    ) -> None:
+        """Construct all attributes for Writer."""
+        self.path = path
+        self.format = format
+        self.batch = batch
+        self._file: TextIO | None = None
+        self._pending: list[str] = list()
+
+    @property
+    def path(self) -> str:
+        """Path to output file."""
+        return self._path
+
+    @path.setter
+    def path(self, path: str) -> None:
+        if isinstance(path, str):
+            self._path = path
+        else:
+            raise ValueError('"path" must be a str')
+
+    @property
+    def format(self) -> str:
+        """Output format ("text", "tsv" or "jsonl")."""
+        return self._format
+
+    @format.setter
+    def format(self, format: str) -> None:
+        if format in FORMATS:
+            self._format = format
+        else:
+            raise ValueError(f'"format" must be one of {FORMATS}')
+
+    @property
+    def batch(self) -> int:
+        """Records held in memory between flushes."""
+        return self._batch
+
+    @batch.setter
+    def batch(self, batch: int) -> None:
+        if isinstance(batch, int) and batch > 0:
+            self._batch = batch
+        else:
+            raise ValueError('"batch" must be a positive int')
+
+    def __enter__(self) -> "Writer":
+        self.open()
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        self.close()
+
+    def open(self) -> None:
+        """Open file for appending, writing a TSV header to a new file."""
+        self._file = open(self.path, "a", buffering=BUFFER)
+        if self.format == "tsv" and self._file.tell() == 0:
+            header: tuple[str, ...] = ("num", "seq1", "seq2") + FIELDS
+            self._pending.append("\t".join(header) + "\n")
+
+    def write(
+        self,
+        num: int,
+        stats: list[float],
+        alignment: tuple[str, str],
+        annotation: str,
+        headers: tuple[str, str] = ("", ""),
+    ) -> None:
+        """
+        Queue one alignment, flushing once batch records are held.
+
+        headers are the FASTA headers of the pair; an empty one is
+        written as seq{num}A or seq{num}B.
+        """
+        names: tuple[str, str] = (
+            headers[0] or f"seq{num}A",
+            headers[1] or f"seq{num}B",
+        )
+        match self.format:
+            case "text":
+                self._pending.append(
+                    self._text(num, names, stats, alignment, annotation)
+                )
+            case "tsv":
+                self._pending.append(self._tsv(num, names, stats))
+            case "jsonl":
+                self._pending.append(self._jsonl(num, names, stats))
+        if len(self._pending) >= self.batch:
+            self.flush()
+
+    def flush(self) -> None:
+        """Write queued records to the file."""
+        if self._file is None:
+            raise ValueError(f"{self.path} is not open")
+        self._file.writelines(self._pending)
+        self._pending = list()
+
+    def close(self) -> None:
+        """Flush queued records and close the file."""
+        if self._file is not None:
+            self.flush()
+            self._file.close()
+            self._file = None
+
+    def _text(
+        self,
+        num: int,
+        names: tuple[str, str],
+        stats: list[float],
+        alignment: tuple[str, str],
+        annotation: str,
+    ) -> str:
+        """Return optimal alignment as output text."""
+        if stats[5] is None:  # rejected, annotation holds the reason
+            return (
+                f"Alignment #{num}:\n\n"
+                f"Sequence #1: {names[0]}\n"
+                f"Sequence #2: {names[1]}\n"
+                f"Rejected: {annotation}\n\n"
+            )
+        seq1: str = alignment[0]
+        seq2: str = alignment[1]
+        text: list[str] = [
+            f"Alignment #{num}:\n",
+            f"Sequence #1: {names[0]}",
+            f"Sequence #2: {names[1]}",
+            f"Matches: {stats[0]}",
+            f"Percent identity: {stats[1]}%",
+            f"Indels: number={stats[2]} mean length={stats[3]}",
+            f"Alignment length: {stats[4]}",
+            f"Score={stats[5]}\n",
+        ]
+        lines: list[str] = [i + "\n" for i in text]
+
+        limit: int = 60
+        for j in range(0, len(seq1), limit):
+            stop: int = j + limit
+            line: str = (
+                f"{seq1[j:stop]}\n{annotation[j:stop]}\n{seq2[j:stop]}\n\n"
+            )
+            lines.append(line)
+        return "".join(lines)
+
+    def _tsv(
+        self, num: int, names: tuple[str, str], stats: list[float]
+    ) -> str:
+        """Return statistics as one tab-separated line."""
+        cells: list[str] = [str(num)]
+        cells.extend(name.replace("\t", " ") for name in names)
+        cells.extend("" if value is None else str(value) for value in stats)
+        return "\t".join(cells) + "\n"
+
+    def _jsonl(
+        self, num: int, names: tuple[str, str], stats: list[float]
+    ) -> str:
+        """Return statistics as one JSON object line."""
+        record: dict[str, object] = {
+            "num": num,
+            "seq1": names[0],
+            "seq2": names[1],
+        }
+        record.update(zip(FIELDS, stats))
+        return json.dumps(record) + "\n"